@@ -1,37 +1,449 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+import asyncio
+import base64
+import hashlib
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import cv2
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 import numpy as np
-from PIL import Image
-import io
-import json
-from typing import Dict, List, Optional
-import time
-import sys
-import os
-import base64
+import orjson
+import cv2
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    # python-dotenv is optional; settings then come from the process environment
+    def load_dotenv(*args, **kwargs):
+        return False
+
+# Load .env once for the whole app, before any service reads its settings
+load_dotenv()
 
-# Add the backend directory to the Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from ..services.posture_analyzer import PostureAnalyzer, PostureAnalysis
+    from ..services.llm_advisor import FormFeedbackCache, VirtualCoachAdvisor, WorkoutPlan, NutritionAdvice
+except ImportError:
+    # Served from the backend directory (uvicorn api.main:app): import the
+    # services through the repository root as the backend package
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from backend.services.posture_analyzer import PostureAnalyzer, PostureAnalysis
+    from backend.services.llm_advisor import FormFeedbackCache, VirtualCoachAdvisor, WorkoutPlan, NutritionAdvice
 
-from services.posture_analyzer import PostureAnalyzer, PostureAnalysis
-from services.llm_advisor import VirtualCoachAdvisor, WorkoutPlan, NutritionAdvice
+class ExerciseType(str, Enum):
+    """Exercises supported by the posture analyzer; FastAPI rejects anything else with 422"""
+    squat = "squat"
+    pushup = "pushup"
+    plank = "plank"
+    lunge = "lunge"
+    deadlift = "deadlift"
 
-app = FastAPI(title="Virtual Fitness Trainer API", version="1.0.0")
+# Static exercise library, serialized once at import time
+EXERCISE_LIBRARY = {
+    "squat": {
+        "name": "Squat",
+        "muscles": ["quadriceps", "glutes", "hamstrings", "core"],
+        "difficulty": "beginner",
+        "equipment": "bodyweight",
+        "description": "Lower body strength exercise targeting legs and glutes",
+        "benefits": ["strength", "mobility", "functional movement"]
+    },
+    "pushup": {
+        "name": "Push-up",
+        "muscles": ["chest", "shoulders", "triceps", "core"],
+        "difficulty": "beginner",
+        "equipment": "bodyweight",
+        "description": "Upper body strength exercise targeting chest and arms",
+        "benefits": ["upper body strength", "core stability"]
+    },
+    "plank": {
+        "name": "Plank",
+        "muscles": ["core", "shoulders", "glutes"],
+        "difficulty": "beginner",
+        "equipment": "bodyweight",
+        "description": "Isometric core strengthening exercise",
+        "benefits": ["core strength", "stability", "endurance"]
+    },
+    "lunge": {
+        "name": "Lunge",
+        "muscles": ["quadriceps", "glutes", "hamstrings", "calves"],
+        "difficulty": "beginner",
+        "equipment": "bodyweight",
+        "description": "Single-leg strength exercise for legs and glutes",
+        "benefits": ["leg strength", "balance", "mobility"]
+    },
+    "deadlift": {
+        "name": "Deadlift",
+        "muscles": ["hamstrings", "glutes", "lower back", "traps"],
+        "difficulty": "intermediate",
+        "equipment": "barbell",
+        "description": "Hip-hinge movement for posterior chain strength",
+        "benefits": ["posterior chain strength", "functional movement"]
+    }
+}
+
+EXERCISE_LIBRARY_BODY = orjson.dumps({
+    "exercises": EXERCISE_LIBRARY,
+    "total_exercises": len(EXERCISE_LIBRARY)
+})
+EXERCISE_LIBRARY_ETAG = '"' + hashlib.sha1(EXERCISE_LIBRARY_BODY).hexdigest() + '"'
+EXERCISE_LIBRARY_HEADERS = {
+    "Cache-Control": "public, max-age=3600",
+    "ETag": EXERCISE_LIBRARY_ETAG
+}
+
+class OrjsonResponse(JSONResponse):
+    """JSON response serialized with orjson (FastAPI's own ORJSONResponse is deprecated)"""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+app = FastAPI(
+    title="Virtual Fitness Trainer API",
+    version="1.0.0",
+    default_response_class=OrjsonResponse
+)
 
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # React app URL
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
 )
 
-# Initialize services
+# Compress large JSON bodies (e.g. /analyze-video frame_analyses)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Initialize services: independent uploads go through a static-image
+# analyzer; video frames are a continuous sequence, so they use
+# tracking-mode analyzers that skip most person detections
 posture_analyzer = PostureAnalyzer()
+posture_analyzer.warmup()
 coach_advisor = VirtualCoachAdvisor()
+form_feedback = FormFeedbackCache(coach_advisor)
+
+# The analyzer keeps temporal history across calls, so threadpool calls
+# into it are serialized
+analyzer_lock = threading.Lock()
+
+# Each video is analyzed by a streaming analyzer it has to itself for the
+# whole upload, reset first so no tracking, smoothing or temporal state
+# carries over from another video. Idle analyzers are kept for reuse; the
+# pool grows to the number of videos analyzed at once
+_idle_video_analyzers: "queue.SimpleQueue[PostureAnalyzer]" = queue.SimpleQueue()
+
+def _acquire_video_analyzer() -> PostureAnalyzer:
+    """A reset streaming analyzer for one video; hand it back with _idle_video_analyzers.put"""
+    try:
+        analyzer = _idle_video_analyzers.get_nowait()
+    except queue.Empty:
+        analyzer = PostureAnalyzer(streaming=True)
+        analyzer.warmup()
+    analyzer.reset()
+    return analyzer
+
+_idle_video_analyzers.put(_acquire_video_analyzer())
+
+# Uploads above this size (typically full-resolution phone photos) are
+# decoded at 1/4 scale; the pose model only needs a few hundred pixels
+REDUCED_DECODE_MIN_BYTES = 2_000_000
+
+def _decode_image(contents: bytes) -> Optional[np.ndarray]:
+    """Decode an uploaded image into a BGR array, downscaling large files during decode"""
+    flags = cv2.IMREAD_REDUCED_COLOR_4 if len(contents) > REDUCED_DECODE_MIN_BYTES else cv2.IMREAD_COLOR
+    return cv2.imdecode(np.frombuffer(contents, dtype=np.uint8), flags)
+
+def _analyze_frames(images: List[np.ndarray], exercise_type: str) -> List[PostureAnalysis]:
+    """Blocking batch analysis, meant to be run via run_in_threadpool"""
+    with analyzer_lock:
+        return posture_analyzer.analyze_batch(images, exercise_type)
+
+# Micro-batching: concurrent /analyze-posture requests are collected for up
+# to MAX_BATCH_DELAY_S (or MAX_BATCH frames) and analyzed in one call
+MAX_BATCH = 8
+MAX_BATCH_DELAY_S = 0.010
+
+_batch_queue: Optional["asyncio.Queue[Tuple[np.ndarray, str, asyncio.Future]]"] = None
+_batcher_task: Optional[asyncio.Task] = None
+
+async def _batcher():
+    """Drain the batch queue, grouping frames by exercise type per analyzer call"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _batch_queue.get()]
+        deadline = loop.time() + MAX_BATCH_DELAY_S
+        while len(batch) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_batch_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        groups: Dict[str, list] = {}
+        for image, exercise_type, fut in batch:
+            groups.setdefault(exercise_type, []).append((image, fut))
+        
+        for exercise_type, items in groups.items():
+            try:
+                results = await run_in_threadpool(
+                    _analyze_frames, [image for image, _ in items], exercise_type
+                )
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), result in zip(items, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+async def analyze_frame_batched(image: np.ndarray, exercise_type: str) -> PostureAnalysis:
+    """Queue a frame for the micro-batcher and wait for its analysis"""
+    global _batch_queue, _batcher_task
+    loop = asyncio.get_running_loop()
+    if _batcher_task is None or _batcher_task.done() or _batcher_task.get_loop() is not loop:
+        # Started lazily so the queue is bound to the serving event loop
+        _batch_queue = asyncio.Queue()
+        _batcher_task = asyncio.create_task(_batcher())
+    fut = loop.create_future()
+    await _batch_queue.put((image, exercise_type, fut))
+    return await fut
+
+def _render_pose_overlay(image: np.ndarray) -> Optional[str]:
+    """Draw detected landmarks on the image (in place) and return it as base64 JPEG"""
+    with analyzer_lock:
+        pose_landmarks = posture_analyzer.extract_pose_landmarks(image)
+        if pose_landmarks is None:
+            return None
+        # The upload is not used after the overlay, so draw straight onto it
+        overlay_image = posture_analyzer.draw_pose_landmarks(image, pose_landmarks, in_place=True)
+    success, buffer = cv2.imencode(".jpg", overlay_image)
+    if not success:
+        return None
+    return base64.b64encode(buffer).decode("utf-8")
+
+def _nvdec_available() -> bool:
+    """Whether OpenCV was built with cudacodec and a CUDA device is present"""
+    try:
+        return hasattr(cv2, "cudacodec") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+# Hardware (NVDEC) video decoding is used when available, otherwise the CPU decoder
+USE_NVDEC = _nvdec_available()
+
+# Sampled frames decoded and analyzed per threadpool call by the buffered
+# /analyze-video response
+VIDEO_CHUNK_FRAMES = 32
+
+# Largest video upload /analyze-video accepts (413 beyond it)
+MAX_VIDEO_UPLOAD_BYTES = 512 << 20
+
+def _save_upload(upload, path: str, max_bytes: int):
+    """Copy an upload to path in 1 MiB blocks, rejecting it with 413 past max_bytes"""
+    copied = 0
+    with open(path, "wb") as out:
+        while True:
+            block = upload.read(1 << 20)
+            if not block:
+                return
+            copied += len(block)
+            if copied > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Video exceeds {max_bytes >> 20} MB")
+            out.write(block)
+
+def _iter_video_chunks_nvdec(reader, frame_interval: int, chunk_frames: int):
+    """Decode every nth frame on the GPU, yielding lists of up to chunk_frames (frame_number, frame)"""
+    chunk = []
+    frame_number = 0
+    
+    while True:
+        ret, gpu_frame = reader.nextFrame()
+        if not ret:
+            break
+        
+        if frame_number % frame_interval == 0:
+            frame = gpu_frame.download()
+            # NVDEC emits BGRA; the analyzer expects 3-channel BGR
+            if frame.ndim == 3 and frame.shape[2] == 4:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+            chunk.append((frame_number, frame))
+            if len(chunk) == chunk_frames:
+                yield chunk
+                chunk = []
+        
+        frame_number += 1
+    
+    if chunk:
+        yield chunk
+
+def _iter_video_chunks(cap: cv2.VideoCapture, frame_interval: int, chunk_frames: int):
+    """Decode every nth frame of an open capture, yielding lists of up to chunk_frames (frame_number, frame)
+    
+    Frames are decoded into one reused block of chunk_frames slots, so a
+    chunk is only valid until the next one is requested.
+    """
+    block = None
+    chunk = []
+    frame_number = 0
+    
+    try:
+        # grab() advances without decoding; only every nth frame is retrieved
+        while cap.grab():
+            if frame_number % frame_interval == 0:
+                k = len(chunk)
+                slot = None if block is None else block[k]
+                ret, frame = cap.retrieve(slot)
+                if not ret:
+                    break
+                if block is None:
+                    block = np.empty((chunk_frames,) + frame.shape, dtype=frame.dtype)
+                if frame is not slot:
+                    # Decoded into a new array: first frame, or OpenCV reallocated
+                    # because the frame no longer fits the slot
+                    if frame.shape != block.shape[1:]:
+                        frame = cv2.resize(frame, (block.shape[2], block.shape[1]))
+                    block[k] = frame
+                chunk.append((frame_number, block[k]))
+                if len(chunk) == chunk_frames:
+                    yield chunk
+                    chunk = []
+            
+            frame_number += 1
+        
+        if chunk:
+            yield chunk
+    finally:
+        cap.release()
+
+def _open_video(video_path: str, frame_interval: int, chunk_frames: int):
+    """Open a video for sampling every nth frame, returning (chunks, frame_count, fps)
+    
+    chunks decodes lazily, yielding lists of up to chunk_frames
+    (frame_number, frame); close it to release the decoder early.
+    """
+    cap = cv2.VideoCapture(video_path)
+    
+    if not cap.isOpened():
+        raise HTTPException(status_code=400, detail="Could not open video file")
+    
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    
+    if USE_NVDEC:
+        try:
+            reader = cv2.cudacodec.createVideoReader(video_path)
+        except cv2.error as e:
+            # Unsupported codec/container on the GPU decoder; fall back to CPU
+            print(f"NVDEC decode failed, falling back to CPU: {e}")
+        else:
+            cap.release()
+            return _iter_video_chunks_nvdec(reader, frame_interval, chunk_frames), frame_count, fps
+    
+    return _iter_video_chunks(cap, frame_interval, chunk_frames), frame_count, fps
+
+def _analyze_next_chunk(chunks, analyzer: PostureAnalyzer, exercise_type: str):
+    """Decode and analyze the next chunk of a video, meant to be run via run_in_threadpool
+    
+    Returns [(frame_number, analysis), ...], or None once the video is exhausted.
+    """
+    chunk = next(chunks, None)
+    if chunk is None:
+        return None
+    analyses = analyzer.analyze_batch([frame for _, frame in chunk], exercise_type)
+    return [(frame_number, analysis) for (frame_number, _), analysis in zip(chunk, analyses)]
+
+def _pack_key_points(key_points: Dict[str, Tuple[float, float]]) -> Dict:
+    """Encode key points as a base64 float16 (K, 2) buffer plus their names"""
+    kp = np.asarray(list(key_points.values()), dtype=np.float16).reshape(-1, 2)
+    return {
+        "names": list(key_points),
+        "shape": kp.shape,
+        "dtype": "float16",
+        "data": base64.b64encode(kp.tobytes()).decode("ascii")
+    }
+
+def _frame_result(frame_number: int, fps: float, analysis: PostureAnalysis) -> Dict:
+    """Per-frame entry of a video analysis"""
+    return {
+        "frame_number": frame_number,
+        "timestamp": frame_number / fps,
+        "form_score": analysis.form_score,
+        "is_correct_form": analysis.is_correct_form,
+        "corrections": analysis.corrections
+    }
+
+async def _video_summary(exercise_type: str, form_scores: np.ndarray, is_correct: np.ndarray,
+                         frame_count: int, fps: float) -> Dict:
+    """Overall performance of a video analysis from the per-frame scores"""
+    if len(form_scores):
+        avg_form_score = float(form_scores.mean())
+        correct_form_percentage = float(is_correct.mean()) * 100.0
+        
+        # Generate overall feedback
+        overall_feedback = await run_in_threadpool(
+            form_feedback.get,
+            exercise_type, 
+            avg_form_score, 
+            []  # No specific corrections for overall analysis
+        )
+    else:
+        avg_form_score = 0
+        correct_form_percentage = 0
+        overall_feedback = "No frames could be analyzed from the video."
+    
+    return {
+        "exercise_type": exercise_type,
+        "total_frames_analyzed": len(form_scores),
+        "total_frames": frame_count,
+        "average_form_score": avg_form_score,
+        "correct_form_percentage": correct_form_percentage,
+        "overall_feedback": overall_feedback,
+        "video_duration": frame_count / fps if fps > 0 else 0,
+        "timestamp": time.time()
+    }
+
+async def _stream_video_analysis(chunks, video_path: str, frame_count: int, fps: float, exercise_type: str):
+    """Yield NDJSON lines: one per frame as it is decoded and analyzed, then the overall summary
+    
+    Takes ownership of the video: the decoder is closed and the file
+    deleted once the stream ends.
+    """
+    form_scores = []
+    is_correct = []
+    try:
+        video_analyzer = await run_in_threadpool(_acquire_video_analyzer)
+        try:
+            while True:
+                results = await run_in_threadpool(_analyze_next_chunk, chunks, video_analyzer, exercise_type)
+                if results is None:
+                    break
+                for frame_number, analysis in results:
+                    form_scores.append(analysis.form_score)
+                    is_correct.append(analysis.is_correct_form)
+                    yield orjson.dumps({"type": "frame", **_frame_result(frame_number, fps, analysis)}) + b"\n"
+        finally:
+            _idle_video_analyzers.put(video_analyzer)
+    finally:
+        chunks.close()
+        os.unlink(video_path)
+    
+    summary = await _video_summary(exercise_type, np.array(form_scores, dtype=np.float64),
+                                   np.array(is_correct, dtype=np.bool_), frame_count, fps)
+    yield orjson.dumps({"type": "summary", **summary}) + b"\n"
 
 @app.get("/")
 async def root():
@@ -44,39 +456,34 @@ async def health_check():
 @app.post("/analyze-posture")
 async def analyze_posture(
     file: UploadFile = File(...),
-    exercise_type: str = Form("squat"),
-    include_pose_overlay: bool = Form(False)
+    exercise_type: ExerciseType = Form(ExerciseType.squat),
+    include_pose_overlay: bool = Form(False),
+    compact_key_points: bool = Form(False)
 ):
     """
     Analyze exercise posture from uploaded image/video
+    
+    With compact_key_points=true, key_points is returned as
+    {"names": [...], "shape": [K, 2], "dtype": "float16", "data": <base64>}
+    instead of a {name: [x, y]} mapping; decode with np.frombuffer(...).reshape(shape).
     """
     try:
-        # Validate exercise type
-        valid_exercises = ['squat', 'pushup', 'plank', 'lunge', 'deadlift']
-        if exercise_type not in valid_exercises:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Invalid exercise type. Must be one of: {valid_exercises}"
-            )
+        exercise_type = exercise_type.value
         
-        # Read and process image
+        # Read and decode image straight into a BGR buffer
         contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        image_array = np.array(image)
-        
-        # Convert PIL image to OpenCV format
-        if len(image_array.shape) == 3:
-            image_cv = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
-        else:
-            image_cv = image_array
+        image_cv = await run_in_threadpool(_decode_image, contents)
+        if image_cv is None:
+            raise HTTPException(status_code=400, detail="Could not decode image file")
         
-        # Analyze posture
+        # Analyze posture off the event loop, batched with concurrent requests
         start_time = time.time()
-        analysis = posture_analyzer.analyze_exercise_form(image_cv, exercise_type)
+        analysis = await analyze_frame_batched(image_cv, exercise_type)
         analysis_time = time.time() - start_time
         
-        # Generate LLM feedback
-        feedback = coach_advisor.analyze_form_feedback(
+        # Generate LLM feedback (network-bound once an LLM client is configured)
+        feedback = await run_in_threadpool(
+            form_feedback.get,
             exercise_type, 
             analysis.form_score, 
             analysis.corrections
@@ -89,22 +496,22 @@ async def analyze_posture(
             "form_score": analysis.form_score,
             "is_correct_form": analysis.is_correct_form,
             "corrections": analysis.corrections,
-            "key_points": analysis.key_points,
+            "key_points": (_pack_key_points(analysis.key_points) if compact_key_points
+                           else analysis.key_points),
             "feedback": feedback,
             "analysis_time_ms": round(analysis_time * 1000, 2),
             "timestamp": time.time()
         }
 
         if include_pose_overlay:
-            pose_landmarks = posture_analyzer.extract_pose_landmarks(image_cv)
-            if pose_landmarks is not None:
-                overlay_image = posture_analyzer.draw_pose_landmarks(image_cv, pose_landmarks)
-                success, buffer = cv2.imencode(".jpg", overlay_image)
-                if success:
-                    response["pose_overlay_image"] = base64.b64encode(buffer).decode("utf-8")
+            overlay = await run_in_threadpool(_render_pose_overlay, image_cv)
+            if overlay is not None:
+                response["pose_overlay_image"] = overlay
         
-        return JSONResponse(content=response)
+        return OrjsonResponse(content=response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing posture: {str(e)}")
 
@@ -140,7 +547,7 @@ async def generate_workout_plan(request: Dict):
                 "target_muscles": plan.target_muscles
             })
         
-        return JSONResponse(content={
+        return OrjsonResponse(content={
             "workout_plans": plans_data,
             "total_exercises": len(plans_data),
             "estimated_duration": workout_duration,
@@ -179,7 +586,7 @@ async def get_nutrition_advice(request: Dict):
                 "benefits": advice.benefits
             })
         
-        return JSONResponse(content={
+        return OrjsonResponse(content={
             "nutrition_advice": advice_data,
             "meal_type": meal_type,
             "timestamp": time.time()
@@ -189,157 +596,107 @@ async def get_nutrition_advice(request: Dict):
         raise HTTPException(status_code=500, detail=f"Error generating nutrition advice: {str(e)}")
 
 @app.get("/exercise-library")
-async def get_exercise_library():
+async def get_exercise_library(request: Request):
     """
     Get available exercises and their details
     """
-    try:
-        exercise_library = {
-            "squat": {
-                "name": "Squat",
-                "muscles": ["quadriceps", "glutes", "hamstrings", "core"],
-                "difficulty": "beginner",
-                "equipment": "bodyweight",
-                "description": "Lower body strength exercise targeting legs and glutes",
-                "benefits": ["strength", "mobility", "functional movement"]
-            },
-            "pushup": {
-                "name": "Push-up",
-                "muscles": ["chest", "shoulders", "triceps", "core"],
-                "difficulty": "beginner",
-                "equipment": "bodyweight",
-                "description": "Upper body strength exercise targeting chest and arms",
-                "benefits": ["upper body strength", "core stability"]
-            },
-            "plank": {
-                "name": "Plank",
-                "muscles": ["core", "shoulders", "glutes"],
-                "difficulty": "beginner",
-                "equipment": "bodyweight",
-                "description": "Isometric core strengthening exercise",
-                "benefits": ["core strength", "stability", "endurance"]
-            },
-            "lunge": {
-                "name": "Lunge",
-                "muscles": ["quadriceps", "glutes", "hamstrings", "calves"],
-                "difficulty": "beginner",
-                "equipment": "bodyweight",
-                "description": "Single-leg strength exercise for legs and glutes",
-                "benefits": ["leg strength", "balance", "mobility"]
-            },
-            "deadlift": {
-                "name": "Deadlift",
-                "muscles": ["hamstrings", "glutes", "lower back", "traps"],
-                "difficulty": "intermediate",
-                "equipment": "barbell",
-                "description": "Hip-hinge movement for posterior chain strength",
-                "benefits": ["posterior chain strength", "functional movement"]
-            }
-        }
-        
-        return JSONResponse(content={
-            "exercises": exercise_library,
-            "total_exercises": len(exercise_library),
-            "timestamp": time.time()
-        })
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving exercise library: {str(e)}")
+    if request.headers.get("if-none-match") == EXERCISE_LIBRARY_ETAG:
+        return Response(status_code=304, headers=EXERCISE_LIBRARY_HEADERS)
+    return Response(
+        content=EXERCISE_LIBRARY_BODY,
+        media_type="application/json",
+        headers=EXERCISE_LIBRARY_HEADERS
+    )
 
 @app.post("/analyze-video")
 async def analyze_video(
     file: UploadFile = File(...),
-    exercise_type: str = Form("squat"),
-    frame_interval: int = Form(5)
+    exercise_type: ExerciseType = Form(ExerciseType.squat),
+    frame_interval: int = Form(5),
+    stream: bool = Form(False)
 ):
     """
     Analyze exercise posture from uploaded video (analyzes every nth frame)
+    
+    With stream=true the response is NDJSON: one {"type": "frame", ...} line
+    per analyzed frame as it completes, then a final {"type": "summary", ...} line.
     """
     try:
-        # Validate exercise type
-        valid_exercises = ['squat', 'pushup', 'plank', 'lunge', 'deadlift']
-        if exercise_type not in valid_exercises:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Invalid exercise type. Must be one of: {valid_exercises}"
-            )
-        
-        # Read video file
-        contents = await file.read()
-        
-        # Save temporary video file
-        temp_video_path = f"temp_video_{int(time.time())}.mp4"
-        with open(temp_video_path, "wb") as f:
-            f.write(contents)
-        
-        # Open video with OpenCV
-        cap = cv2.VideoCapture(temp_video_path)
-        
-        if not cap.isOpened():
-            raise HTTPException(status_code=400, detail="Could not open video file")
-        
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        
-        analyses = []
-        frame_number = 0
+        exercise_type = exercise_type.value
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Analyze every nth frame
-            if frame_number % frame_interval == 0:
-                analysis = posture_analyzer.analyze_exercise_form(frame, exercise_type)
-                analyses.append({
-                    "frame_number": frame_number,
-                    "timestamp": frame_number / fps,
-                    "form_score": analysis.form_score,
-                    "is_correct_form": analysis.is_correct_form,
-                    "corrections": analysis.corrections
-                })
+        # Stream the upload to disk in chunks instead of reading it into memory
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
+            temp_video_path = tmp.name
+        try:
+            await run_in_threadpool(_save_upload, file.file, temp_video_path, MAX_VIDEO_UPLOAD_BYTES)
             
-            frame_number += 1
-        
-        cap.release()
-        
-        # Clean up temporary file
-        import os
-        if os.path.exists(temp_video_path):
-            os.remove(temp_video_path)
-        
-        # Calculate overall performance
-        if analyses:
-            avg_form_score = sum(a["form_score"] for a in analyses) / len(analyses)
-            correct_form_percentage = sum(1 for a in analyses if a["is_correct_form"]) / len(analyses) * 100
+            if stream:
+                # Frames are decoded one at a time as the response is sent
+                chunks, frame_count, fps = await run_in_threadpool(
+                    _open_video, temp_video_path, frame_interval, 1
+                )
+                response = StreamingResponse(
+                    _stream_video_analysis(chunks, temp_video_path, frame_count, fps, exercise_type),
+                    media_type="application/x-ndjson"
+                )
+                # The stream now owns (and deletes) the video
+                temp_video_path = None
+                return response
             
-            # Generate overall feedback
-            overall_feedback = coach_advisor.analyze_form_feedback(
-                exercise_type, 
-                avg_form_score, 
-                []  # No specific corrections for overall analysis
+            # Frames are decoded and analyzed VIDEO_CHUNK_FRAMES at a time, so
+            # memory stays bounded however long the video is
+            chunks, frame_count, fps = await run_in_threadpool(
+                _open_video, temp_video_path, frame_interval, VIDEO_CHUNK_FRAMES
             )
-        else:
-            avg_form_score = 0
-            correct_form_percentage = 0
-            overall_feedback = "No frames could be analyzed from the video."
+            analyses = []
+            form_scores = []
+            is_correct = []
+            video_analyzer = await run_in_threadpool(_acquire_video_analyzer)
+            try:
+                while True:
+                    results = await run_in_threadpool(_analyze_next_chunk, chunks, video_analyzer, exercise_type)
+                    if results is None:
+                        break
+                    for frame_number, analysis in results:
+                        form_scores.append(analysis.form_score)
+                        is_correct.append(analysis.is_correct_form)
+                        analyses.append(_frame_result(frame_number, fps, analysis))
+            finally:
+                _idle_video_analyzers.put(video_analyzer)
+                chunks.close()
+        finally:
+            # Clean up temporary file, including on error paths
+            if temp_video_path is not None:
+                os.unlink(temp_video_path)
         
-        return JSONResponse(content={
-            "exercise_type": exercise_type,
-            "total_frames_analyzed": len(analyses),
-            "total_frames": frame_count,
-            "average_form_score": avg_form_score,
-            "correct_form_percentage": correct_form_percentage,
-            "frame_analyses": analyses,
-            "overall_feedback": overall_feedback,
-            "video_duration": frame_count / fps if fps > 0 else 0,
-            "timestamp": time.time()
-        })
+        summary = await _video_summary(exercise_type, np.array(form_scores, dtype=np.float64),
+                                       np.array(is_correct, dtype=np.bool_), frame_count, fps)
+        summary["frame_analyses"] = analyses
+        return OrjsonResponse(content=summary)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing video: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Each worker builds its own pose graphs and a cpu_count-thread batch
+    # pool, so extra workers are opt-in via WEB_CONCURRENCY
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    # A single worker serves this already-initialized app; multiple workers
+    # need an import string (package path under python -m backend.api.main)
+    if workers > 1:
+        target = f"{__spec__.name}:app" if __spec__ else "api.main:app"
+    else:
+        target = app
+    uvicorn.run(
+        target,
+        host="0.0.0.0",
+        port=8000,
+        # uvloop where installed (not on Windows), asyncio otherwise
+        loop="auto",
+        http="httptools",
+        workers=workers,
+        log_level="warning"
+    )
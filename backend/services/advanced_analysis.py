@@ -2,86 +2,349 @@
 Advanced algorithms for more accurate posture analysis
 Includes temporal tracking, advanced geometric calculations, and biomechanical analysis
 """
+import math
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Deque
-from collections import deque
-from scipy.spatial.distance import euclidean
-from scipy.interpolate import interp1d
-from scipy.signal import savgol_filter
-import cv2
+from typing import Dict, List, NamedTuple, Tuple, Optional, Union
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# MediaPipe landmark indices used by the geometric checks
+# Spine landmarks: nose, left shoulder, right shoulder, left hip, right hip
+SPINE_IDX = np.array([0, 11, 12, 23, 24], dtype=np.intp)
+# Hip, knee, ankle, foot index for the left (row 0) and right (row 1) leg
+LEG_IDX = np.array([[23, 25, 27, 31], [24, 26, 28, 32]], dtype=np.intp)
+
+# Joint-angle vector layout: PostureAnalyzer.calculate_angles fills it, the analyzers index it
+JOINT_ANGLE_NAMES = ('left_knee_angle', 'right_knee_angle', 'left_elbow_angle', 'right_elbow_angle')
+LEFT_KNEE_ANGLE, RIGHT_KNEE_ANGLE, LEFT_ELBOW_ANGLE, RIGHT_ELBOW_ANGLE = range(len(JOINT_ANGLE_NAMES))
+
+# Depth bands as inclusive distances from a 90-degree joint angle -> score per band
+SQUAT_DEPTH_EDGES = np.array([5.0, 15.0, 25.0])
+SQUAT_DEPTH_SCORES = np.array([1.0, 0.8, 0.6, 0.3])
+PUSHUP_DEPTH_EDGES = np.array([10.0, 20.0])
+PUSHUP_DEPTH_SCORES = np.array([1.0, 0.7, 0.4])
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; fall back to plain Python kernels
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Scoring kernels over one frame's full-body (33, 3) landmarks. Each formula
+# lives only here: the geometric and biomechanical analyzers below, per frame
+# and batched, and PostureAnalyzer's own exercise kernels all build on them
+
+@njit
+def _xy_angle(ux: float, uy: float, vx: float, vy: float) -> float:
+    """Angle (degrees) between 2D vectors u and v, via atan2(|u x v|, u . v)"""
+    return math.degrees(math.atan2(abs(ux * vy - uy * vx), ux * vx + uy * vy))
+
+@njit
+def _band_score(edges: np.ndarray, scores: np.ndarray, offset: float) -> float:
+    """Score of the band that an offset from the ideal angle falls in"""
+    return scores[np.searchsorted(edges, offset)]
+
+@njit
+def _depth_score(edges: np.ndarray, scores: np.ndarray, angle: float) -> float:
+    """Depth band score around 90 degrees; an unmeasured (NaN) angle gets the lowest band"""
+    if math.isnan(angle):
+        return scores[-1]
+    return _band_score(edges, scores, abs(angle - 90.0))
+
+@njit
+def _spine_angle(points: np.ndarray) -> float:
+    """Mean angle (degrees) between consecutive spine segments, projected to (y, z)
+    
+    Pairs where either segment has zero length are skipped; NaN if none are left.
+    """
+    total = 0.0
+    count = 0
+    for k in range(len(SPINE_IDX) - 2):
+        a, b, c = SPINE_IDX[k], SPINE_IDX[k + 1], SPINE_IDX[k + 2]
+        s1y, s1z = points[b, 1] - points[a, 1], points[b, 2] - points[a, 2]
+        s2y, s2z = points[c, 1] - points[b, 1], points[c, 2] - points[b, 2]
+        if (s1y != 0.0 or s1z != 0.0) and (s2y != 0.0 or s2z != 0.0):
+            total += _xy_angle(s1y, s1z, s2y, s2z)
+            count += 1
+    if count == 0:
+        return math.nan
+    return total / count
+
+@njit
+def _spine_straightness(points: np.ndarray) -> float:
+    """1 - spine curvature (straight spine: segment angles near 180 degrees); 1 if unmeasurable"""
+    angle = _spine_angle(points)
+    if math.isnan(angle):
+        return 1.0
+    return 1.0 - abs(180 - angle) / 180.0
+
+@njit
+def _knee_tracking(points: np.ndarray) -> Tuple[float, float]:
+    """(left, right) knee tracking: knee x against the ankle / foot index midpoint (front view)"""
+    tracking = np.empty(2)
+    for side in range(2):
+        knee, ankle, foot = LEG_IDX[side, 1], LEG_IDX[side, 2], LEG_IDX[side, 3]
+        knee_offset = abs(points[knee, 0] - (points[foot, 0] + points[ankle, 0]) / 2)
+        # Smaller offset (normalized coordinates) = better tracking
+        tracking[side] = 1.0 / (1.0 + knee_offset * 20)
+    return tracking[0], tracking[1]
+
+@njit
+def _torso_alignment(points: np.ndarray) -> Tuple[float, float, float]:
+    """(alignment, shoulder_hip_parallel, vertical_alignment) of the torso"""
+    # Shoulders parallel to hips: shoulder line (11 -> 12) against hip line (23 -> 24);
+    # parallel lines are at close to 0 or 180 degrees
+    sx, sy = points[12, 0] - points[11, 0], points[12, 1] - points[11, 1]
+    hx, hy = points[24, 0] - points[23, 0], points[24, 1] - points[23, 1]
+    shoulder_hip = 0.5
+    if (sx != 0.0 or sy != 0.0) and (hx != 0.0 or hy != 0.0):
+        angle = _xy_angle(sx, sy, hx, hy)
+        shoulder_hip = max(0.0, 1.0 - min(angle, 180 - angle) / 90.0)
+    
+    # Vertical alignment: x difference between left shoulder and left hip
+    vertical = 1.0 / (1.0 + abs(points[11, 0] - points[23, 0]) * 10)
+    return (shoulder_hip + vertical) / 2.0, shoulder_hip, vertical
+
+@njit
+def _hip_hinge_angle(points: np.ndarray) -> float:
+    """Angle (degrees) at the left hip between the knee and the shoulder; 0 for zero-length segments"""
+    kx, ky = points[25, 0] - points[23, 0], points[25, 1] - points[23, 1]
+    sx, sy = points[11, 0] - points[23, 0], points[11, 1] - points[23, 1]
+    if (kx != 0.0 or ky != 0.0) and (sx != 0.0 or sy != 0.0):
+        return _xy_angle(kx, ky, sx, sy)
+    return 0.0
+
+@njit
+def _plank_hip_position(points: np.ndarray) -> float:
+    """Plank hip position: shoulder-hip and hip-ankle drops (left side) should be roughly equal"""
+    shoulder_hip = points[23, 1] - points[11, 1]
+    hip_ankle = points[27, 1] - points[23, 1]
+    return 1.0 / (1.0 + abs(shoulder_hip - hip_ankle) * 5)
+
+@njit
+def _squat_overall(depth_score: float, back_straightness: float, knee_tracking: float) -> float:
+    return depth_score * 0.4 + back_straightness * 0.3 + knee_tracking * 0.3
+
+@njit
+def _pushup_overall(body_alignment: float, depth_score: float, core_engagement: float) -> float:
+    return body_alignment * 0.4 + depth_score * 0.4 + core_engagement * 0.2
+
+@njit
+def _plank_overall(body_straightness: float, hip_position: float) -> float:
+    return body_straightness * 0.6 + hip_position * 0.4
+
+@njit
+def _squat_scores(points: np.ndarray, knee_angle: float) -> Tuple[float, float, float, float]:
+    """SquatScores fields from full-body landmarks and the left knee angle"""
+    depth_score = _depth_score(SQUAT_DEPTH_EDGES, SQUAT_DEPTH_SCORES, knee_angle)
+    back_straightness = _spine_straightness(points)
+    left, right = _knee_tracking(points)
+    knee_tracking = (left + right) / 2.0
+    return (depth_score, back_straightness, knee_tracking,
+            _squat_overall(depth_score, back_straightness, knee_tracking))
+
+@njit
+def _pushup_scores(points: np.ndarray, elbow_angle: float) -> Tuple[float, float, float, float]:
+    """PushupScores fields from full-body landmarks and the left elbow angle"""
+    # Core engagement is estimated from the torso's vertical alignment
+    body_alignment, _, core_engagement = _torso_alignment(points)
+    depth_score = _depth_score(PUSHUP_DEPTH_EDGES, PUSHUP_DEPTH_SCORES, elbow_angle)
+    return (body_alignment, depth_score, core_engagement,
+            _pushup_overall(body_alignment, depth_score, core_engagement))
+
+@njit
+def _plank_scores(points: np.ndarray) -> Tuple[float, float, float]:
+    """PlankScores fields from full-body landmarks"""
+    _, _, body_straightness = _torso_alignment(points)
+    hip_position = _plank_hip_position(points)
+    return body_straightness, hip_position, _plank_overall(body_straightness, hip_position)
+
+
+def _kalman_gain_schedule(process_variance: float, measurement_variance: float,
+                          max_updates: int = 200) -> np.ndarray:
+    """Gain KalmanFilter.update applies to its 1st, 2nd, ... measurement
+    
+    The gain sequence depends only on the variances, not on the measurements,
+    and converges to the steady-state gain; the last entry is that gain.
+    """
+    gains = [1.0]  # The first measurement is taken as the estimate
+    estimation_error = 1.0
+    while len(gains) < max_updates:
+        prediction_error = estimation_error + process_variance
+        kalman_gain = prediction_error / (prediction_error + measurement_variance)
+        estimation_error = (1 - kalman_gain) * prediction_error
+        if kalman_gain == gains[-1]:
+            break
+        gains.append(kalman_gain)
+    return np.array(gains)
+
+
+def angles_to_dict(angles: np.ndarray) -> Dict[str, float]:
+    """{name: angle} form of a joint-angle vector, for API responses and legacy callers"""
+    return dict(zip(JOINT_ANGLE_NAMES, np.asarray(angles).tolist()))
+
+
+class SquatScores(NamedTuple):
+    """Squat biomechanics, per frame (floats) or per batch (arrays)"""
+    depth_score: float
+    back_straightness: float
+    knee_tracking: float
+    overall_score: float
+
+
+class PushupScores(NamedTuple):
+    """Push-up biomechanics, per frame (floats) or per batch (arrays)"""
+    body_alignment: float
+    depth_score: float
+    core_engagement: float
+    overall_score: float
+
+
+class PlankScores(NamedTuple):
+    """Plank biomechanics, per frame (floats) or per batch (arrays)"""
+    body_straightness: float
+    hip_position: float
+    overall_score: float
+
+
+@dataclass(frozen=True)
+class LandmarkView:
+    """One frame's landmarks reshaped once to (n_landmarks, 3), shared by every analyzer call"""
+    pts: np.ndarray
+    
+    @classmethod
+    def of(cls, points: Union[np.ndarray, 'LandmarkView']) -> 'LandmarkView':
+        """Wrap flat or (n, 3) landmarks; an existing view is returned as is"""
+        if isinstance(points, cls):
+            return points
+        return cls(np.asarray(points).reshape(-1, 3))
+    
+    @property
+    def is_full_body(self) -> bool:
+        """True when all 33 MediaPipe pose landmarks are present"""
+        return len(self.pts) >= 33
 
 
 class TemporalAnalyzer:
     """Temporal analysis for tracking movement patterns across frames"""
     
+    __slots__ = ('window_size', '_poses', '_timestamps', '_head', '_count',
+                 '_angle_idx', '_angles', '_angle_present')
+    
     def __init__(self, window_size: int = 10):
         self.window_size = window_size
-        self.pose_history: Deque[np.ndarray] = deque(maxlen=window_size)
-        self.angle_history: Deque[Dict[str, float]] = deque(maxlen=window_size)
-        self.timestamps: Deque[float] = deque(maxlen=window_size)
+        # Poses live in a fixed float32 (window_size, n_landmarks, 3) ring buffer,
+        # allocated on the first frame once the landmark count is known.
+        # Timestamps stay float64: clock seconds need the full mantissa
+        self._poses: Optional[np.ndarray] = None
+        self._timestamps = np.zeros(window_size)
+        self._head = 0
+        self._count = 0
+        # Angles share the ring: one column per angle key, added as keys appear.
+        # Missing angles read as 0; _angle_present tracks which keys each frame had
+        self._angle_idx: Dict[str, int] = {}
+        self._angles = np.zeros((window_size, 0), dtype=np.float32)
+        self._angle_present = np.zeros((window_size, 0), dtype=np.bool_)
+    
+    def add_frame(self, landmarks: np.ndarray, angles: Union[Dict[str, float], np.ndarray], timestamp: float):
+        """Add a new frame to the temporal analysis (angles as a dict or a joint-angle vector)"""
+        if isinstance(angles, np.ndarray):
+            keys, values = JOINT_ANGLE_NAMES[:len(angles)], angles
+        else:
+            keys, values = list(angles), list(angles.values())
+        
+        n_landmarks = landmarks.size // 3
+        if self._poses is None or self._poses.shape[1] != n_landmarks:
+            self._poses = np.empty((self.window_size, n_landmarks, 3), dtype=np.float32)
+            self._head = 0
+            self._count = 0
+        
+        new_keys = [key for key in keys if key not in self._angle_idx]
+        if new_keys:
+            for key in new_keys:
+                self._angle_idx[key] = len(self._angle_idx)
+            pad = ((0, 0), (0, len(new_keys)))
+            self._angles = np.pad(self._angles, pad)
+            self._angle_present = np.pad(self._angle_present, pad)
+        
+        self._poses[self._head] = landmarks.reshape(-1, 3)
+        self._timestamps[self._head] = timestamp
+        self._angles[self._head] = 0.0
+        self._angle_present[self._head] = False
+        columns = [self._angle_idx[key] for key in keys]
+        self._angles[self._head, columns] = values
+        self._angle_present[self._head, columns] = True
+        self._head = (self._head + 1) % self.window_size
+        self._count = min(self._count + 1, self.window_size)
+    
+    def _ordered(self, buffer: np.ndarray) -> np.ndarray:
+        """Oldest-to-newest view of the filled part of a ring buffer"""
+        if self._count < self.window_size:
+            return buffer[:self._count]
+        return np.concatenate((buffer[self._head:], buffer[:self._head]))
     
-    def add_frame(self, landmarks: np.ndarray, angles: Dict[str, float], timestamp: float):
-        """Add a new frame to the temporal analysis"""
-        self.pose_history.append(landmarks.copy())
-        self.angle_history.append(angles.copy())
-        self.timestamps.append(timestamp)
+    @property
+    def pose_history(self) -> np.ndarray:
+        """Recent poses, oldest first, as a (T, n_landmarks, 3) array"""
+        if self._poses is None:
+            return np.empty((0, 0, 3), dtype=np.float32)
+        return self._ordered(self._poses)
+    
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Timestamps of the recent poses, oldest first"""
+        return self._ordered(self._timestamps)
+    
+    def _angle_series(self, angle_key: str) -> np.ndarray:
+        """Recent values of one angle, oldest first (0 where a frame lacked it)"""
+        if angle_key not in self._angle_idx:
+            return np.zeros(self._count, dtype=np.float32)
+        return self._ordered(self._angles[:, self._angle_idx[angle_key]])
     
     def calculate_movement_velocity(self, joint_indices: List[int]) -> Dict[int, float]:
         """Calculate velocity of specific joints over time"""
-        if len(self.pose_history) < 2:
+        if self._count < 2:
+            return {}
+        
+        poses = self.pose_history
+        joint_indices = [idx for idx in joint_indices if idx < poses.shape[1]]
+        if not joint_indices:
             return {}
         
-        velocities = {}
-        for joint_idx in joint_indices:
-            positions = []
-            for pose in self.pose_history:
-                if joint_idx < len(pose.reshape(-1, 3)):
-                    point = pose.reshape(-1, 3)[joint_idx]
-                    positions.append(point[:2])  # x, y only
-            
-            if len(positions) >= 2:
-                # Calculate velocity as change in position over time
-                total_distance = 0
-                for i in range(1, len(positions)):
-                    total_distance += euclidean(positions[i], positions[i-1])
-                
-                if len(self.timestamps) > 1:
-                    time_span = self.timestamps[-1] - self.timestamps[0]
-                    velocities[joint_idx] = total_distance / time_span if time_span > 0 else 0
+        # Sum of frame-to-frame x, y displacements for every joint at once
+        deltas = np.diff(poses[:, joint_indices, :2], axis=0)
+        total_distances = np.hypot(deltas[..., 0], deltas[..., 1]).sum(axis=0)
         
-        return velocities
+        timestamps = self.timestamps
+        time_span = timestamps[-1] - timestamps[0]
+        if time_span <= 0:
+            return dict.fromkeys(joint_indices, 0)
+        return dict(zip(joint_indices, (total_distances / time_span).tolist()))
     
     def calculate_angle_smoothness(self, angle_key: str) -> float:
         """Calculate how smooth angle changes are (lower = smoother)"""
-        if len(self.angle_history) < 3:
+        if self._count < 3:
             return 1.0  # No data = not smooth
         
-        angles = [angles.get(angle_key, 0) for angles in self.angle_history]
-        
-        # Calculate second derivative (acceleration) - smoother = lower acceleration
-        if len(angles) >= 3:
-            second_derivatives = []
-            for i in range(1, len(angles) - 1):
-                # Second derivative approximation
-                accel = abs(angles[i+1] - 2*angles[i] + angles[i-1])
-                second_derivatives.append(accel)
-            
-            avg_accel = np.mean(second_derivatives) if second_derivatives else 1.0
-            # Normalize to 0-1 scale (smooth = close to 0)
-            smoothness = 1.0 / (1.0 + avg_accel / 10.0)
-            return min(smoothness, 1.0)
-        
-        return 0.5
+        # Second derivative (acceleration) - smoother = lower acceleration
+        avg_accel = float(np.abs(np.diff(self._angle_series(angle_key), n=2)).mean())
+        # Normalize to 0-1 scale (smooth = close to 0)
+        smoothness = 1.0 / (1.0 + avg_accel / 10.0)
+        return min(smoothness, 1.0)
     
     def detect_movement_phase(self, angle_key: str) -> str:
         """Detect if movement is in eccentric (down) or concentric (up) phase"""
-        if len(self.angle_history) < 3:
+        if self._count < 3:
             return "unknown"
         
-        angles = [angles.get(angle_key, 0) for angles in self.angle_history]
+        angles = self._angle_series(angle_key)
         
         # Calculate trend
-        recent_change = angles[-1] - angles[-3] if len(angles) >= 3 else 0
+        recent_change = angles[-1] - angles[-3]
         
         if recent_change > 5:  # Angle increasing
             return "concentric"  # Coming up
@@ -92,319 +355,180 @@ class TemporalAnalyzer:
     
     def calculate_consistency_score(self) -> float:
         """Calculate how consistent the form is across recent frames"""
-        if len(self.angle_history) < 3:
+        if self._count < 3:
             return 0.5
         
-        # Get all angle keys
-        all_keys = set()
-        for angles in self.angle_history:
-            all_keys.update(angles.keys())
-        
-        consistency_scores = []
-        for key in all_keys:
-            angles = [angles.get(key, 0) for angles in self.angle_history]
-            if len(angles) > 1:
-                # Lower variance = more consistent
-                variance = np.var(angles)
-                # Normalize variance (assuming angles in 0-180 range)
-                normalized_variance = variance / (180.0 ** 2)
-                consistency = 1.0 / (1.0 + normalized_variance * 10)
-                consistency_scores.append(consistency)
+        # Only angle keys seen somewhere in the current window count
+        angles = self._ordered(self._angles)
+        seen = self._ordered(self._angle_present).any(axis=0)
+        if not seen.any():
+            return 0.5
         
-        return np.mean(consistency_scores) if consistency_scores else 0.5
+        # Lower variance = more consistent; all keys at once
+        variance = np.var(angles[:, seen], axis=0, dtype=np.float64)
+        # Normalize variance (assuming angles in 0-180 range)
+        normalized_variance = variance / (180.0 ** 2)
+        return float(np.mean(1.0 / (1.0 + normalized_variance * 10)))
 
 
 class AdvancedGeometricAnalyzer:
     """Advanced geometric algorithms for precise form analysis"""
     
     @staticmethod
-    def calculate_spine_curvature(points: np.ndarray) -> Dict[str, float]:
+    def calculate_spine_curvature(points: Union[np.ndarray, LandmarkView]) -> Dict[str, float]:
         """Calculate spine curvature using multiple points along the spine"""
-        if len(points) < 33:
+        view = LandmarkView.of(points)
+        if not view.is_full_body:
             return {'curvature': 0.0, 'is_straight': True}
         
-        points_3d = points.reshape(-1, 3)
-        
-        # Spine landmarks: nose, shoulders, hips
-        spine_points = []
-        spine_indices = [0, 11, 12, 23, 24]  # nose, left shoulder, right shoulder, left hip, right hip
-        
-        for idx in spine_indices:
-            if idx < len(points_3d):
-                spine_points.append(points_3d[idx])
-        
-        if len(spine_points) < 3:
+        avg_angle = _spine_angle(view.pts)
+        if math.isnan(avg_angle):
             return {'curvature': 0.0, 'is_straight': True}
-        
-        # Calculate curvature using angle between spine segments
-        spine_points = np.array(spine_points)
-        
-        # Project to 2D (side view) - use y and z coordinates
-        spine_2d = spine_points[:, [1, 2]]  # y, z coordinates
-        
-        # Calculate angles between consecutive segments
-        angles = []
-        for i in range(len(spine_2d) - 2):
-            v1 = spine_2d[i+1] - spine_2d[i]
-            v2 = spine_2d[i+2] - spine_2d[i+1]
-            
-            if np.linalg.norm(v1) > 0 and np.linalg.norm(v2) > 0:
-                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                angle = np.degrees(np.arccos(cos_angle))
-                angles.append(angle)
-        
-        if angles:
-            # Straight spine should have angles close to 180 degrees
-            avg_angle = np.mean(angles)
-            curvature = abs(180 - avg_angle) / 180.0  # Normalize to 0-1
-            is_straight = avg_angle > 170  # Within 10 degrees of straight
-            
-            return {
-                'curvature': curvature,
-                'is_straight': is_straight,
-                'avg_angle': avg_angle
-            }
-        
-        return {'curvature': 0.0, 'is_straight': True}
+        # Straight spine should have angles close to 180 degrees
+        return {
+            'curvature': abs(180 - avg_angle) / 180.0,  # Normalize to 0-1
+            'is_straight': avg_angle > 170,  # Within 10 degrees of straight
+            'avg_angle': avg_angle
+        }
     
     @staticmethod
-    def calculate_knee_tracking_accuracy(points: np.ndarray) -> Dict[str, float]:
+    def calculate_knee_tracking_accuracy(points: Union[np.ndarray, LandmarkView]) -> Dict[str, float]:
         """Calculate if knees track properly over toes using 2D projection"""
-        if len(points) < 33:
+        view = LandmarkView.of(points)
+        if not view.is_full_body:
             return {'left_tracking': 0.0, 'right_tracking': 0.0, 'overall': 0.0}
         
-        points_3d = points.reshape(-1, 3)
-        
-        # Get key points (project to 2D - x, y plane)
-        # Left side
-        left_hip = points_3d[23] if len(points_3d) > 23 else None
-        left_knee = points_3d[25] if len(points_3d) > 25 else None
-        left_ankle = points_3d[27] if len(points_3d) > 27 else None
-        left_foot = points_3d[31] if len(points_3d) > 31 else None  # Left foot index
-        
-        # Right side
-        right_hip = points_3d[24] if len(points_3d) > 24 else None
-        right_knee = points_3d[26] if len(points_3d) > 26 else None
-        right_ankle = points_3d[28] if len(points_3d) > 28 else None
-        right_foot = points_3d[32] if len(points_3d) > 32 else None  # Right foot index
-        
-        def calculate_tracking_score(hip, knee, ankle, foot):
-            """Calculate how well knee tracks over foot"""
-            if hip is None or knee is None or ankle is None or foot is None:
-                return 0.0
-            
-            # Project to 2D (x, y plane - front view)
-            hip_2d = hip[:2]
-            knee_2d = knee[:2]
-            ankle_2d = ankle[:2]
-            foot_2d = foot[:2]
-            
-            # Calculate if knee is aligned with foot (x-coordinate alignment)
-            # Good tracking: knee x should be between ankle x and foot x
-            foot_ankle_center_x = (foot_2d[0] + ankle_2d[0]) / 2
-            knee_offset = abs(knee_2d[0] - foot_ankle_center_x)
-            
-            # Normalize offset (assuming normalized coordinates 0-1)
-            # Smaller offset = better tracking
-            tracking_score = 1.0 / (1.0 + knee_offset * 20)
-            
-            return tracking_score
-        
-        left_tracking = calculate_tracking_score(left_hip, left_knee, left_ankle, left_foot)
-        right_tracking = calculate_tracking_score(right_hip, right_knee, right_ankle, right_foot)
-        
-        overall = (left_tracking + right_tracking) / 2.0
-        
+        left_tracking, right_tracking = _knee_tracking(view.pts)
         return {
             'left_tracking': left_tracking,
             'right_tracking': right_tracking,
-            'overall': overall
+            'overall': (left_tracking + right_tracking) / 2.0
         }
     
     @staticmethod
-    def calculate_body_alignment_score(points: np.ndarray) -> Dict[str, float]:
+    def calculate_body_alignment_score(points: Union[np.ndarray, LandmarkView]) -> Dict[str, float]:
         """Calculate overall body alignment using multiple reference lines"""
-        if len(points) < 33:
+        view = LandmarkView.of(points)
+        if not view.is_full_body:
             return {'alignment': 0.0, 'shoulder_hip_parallel': 0.0, 'vertical_alignment': 0.0}
         
-        points_3d = points.reshape(-1, 3)
-        
-        # 1. Check if shoulders are parallel to hips (good alignment indicator)
-        left_shoulder = points_3d[11] if len(points_3d) > 11 else None
-        right_shoulder = points_3d[12] if len(points_3d) > 12 else None
-        left_hip = points_3d[23] if len(points_3d) > 23 else None
-        right_hip = points_3d[24] if len(points_3d) > 24 else None
-        
-        shoulder_hip_score = 0.5
-        if all([left_shoulder, right_shoulder, left_hip, right_hip]):
-            # Calculate angles of shoulder and hip lines
-            shoulder_line = right_shoulder[:2] - left_shoulder[:2]
-            hip_line = right_hip[:2] - left_hip[:2]
-            
-            if np.linalg.norm(shoulder_line) > 0 and np.linalg.norm(hip_line) > 0:
-                cos_angle = np.dot(shoulder_line, hip_line) / (
-                    np.linalg.norm(shoulder_line) * np.linalg.norm(hip_line)
-                )
-                cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                angle = np.degrees(np.arccos(cos_angle))
-                
-                # Parallel lines should have angle close to 0 or 180
-                parallel_score = 1.0 - min(angle, 180 - angle) / 90.0
-                shoulder_hip_score = max(0, parallel_score)
-        
-        # 2. Check vertical alignment (shoulders, hips, knees in line)
-        vertical_alignment_score = 0.5
-        if all([left_shoulder, left_hip]):
-            # Check if key points are vertically aligned
-            shoulder_hip_vertical_diff = abs(left_shoulder[0] - left_hip[0])  # x-coordinate difference
-            # Smaller difference = better vertical alignment
-            vertical_alignment_score = 1.0 / (1.0 + shoulder_hip_vertical_diff * 10)
-        
-        # Overall alignment is average of both scores
-        overall_alignment = (shoulder_hip_score + vertical_alignment_score) / 2.0
-        
+        alignment, shoulder_hip_parallel, vertical_alignment = _torso_alignment(view.pts)
         return {
-            'alignment': overall_alignment,
-            'shoulder_hip_parallel': shoulder_hip_score,
-            'vertical_alignment': vertical_alignment_score
+            'alignment': alignment,
+            'shoulder_hip_parallel': shoulder_hip_parallel,
+            'vertical_alignment': vertical_alignment
         }
     
     @staticmethod
-    def calculate_hip_hinge_angle(points: np.ndarray) -> float:
+    def calculate_hip_hinge_angle(points: Union[np.ndarray, LandmarkView]) -> float:
         """Calculate hip hinge angle for deadlift analysis"""
-        if len(points) < 33:
+        view = LandmarkView.of(points)
+        if not view.is_full_body:
             return 0.0
-        
-        points_3d = points.reshape(-1, 3)
-        
-        # Get hip, knee, and shoulder points
-        left_hip = points_3d[23] if len(points_3d) > 23 else None
-        left_knee = points_3d[25] if len(points_3d) > 25 else None
-        left_shoulder = points_3d[11] if len(points_3d) > 11 else None
-        
-        if not all([left_hip, left_knee, left_shoulder]):
-            return 0.0
-        
-        # Calculate angle between hip-knee line and hip-shoulder line
-        hip_knee = left_knee[:2] - left_hip[:2]
-        hip_shoulder = left_shoulder[:2] - left_hip[:2]
-        
-        if np.linalg.norm(hip_knee) > 0 and np.linalg.norm(hip_shoulder) > 0:
-            cos_angle = np.dot(hip_knee, hip_shoulder) / (
-                np.linalg.norm(hip_knee) * np.linalg.norm(hip_shoulder)
-            )
-            cos_angle = np.clip(cos_angle, -1.0, 1.0)
-            angle = np.degrees(np.arccos(cos_angle))
-            return angle
-        
-        return 0.0
+        return _hip_hinge_angle(view.pts)
 
 
 class BiomechanicalAnalyzer:
-    """Biomechanical analysis for exercise-specific form evaluation"""
+    """Biomechanical analysis for exercise-specific form evaluation
+    
+    The analyze_* methods score one frame and analyze_batch a whole
+    sequence of frames; both run the module's _*_scores kernels.
+    """
     
     @staticmethod
-    def analyze_squat_biomechanics(points: np.ndarray, angles: Dict[str, float]) -> Dict[str, float]:
+    def analyze_squat_biomechanics(points: Union[np.ndarray, LandmarkView], angles: np.ndarray) -> SquatScores:
         """Advanced squat biomechanical analysis"""
-        results = {}
-        
-        # 1. Depth analysis using knee angle
-        knee_angle = angles.get('left_knee_angle', 180)
-        if 85 <= knee_angle <= 95:
-            results['depth_score'] = 1.0
-        elif 75 <= knee_angle <= 105:
-            results['depth_score'] = 0.8
-        elif 65 <= knee_angle <= 115:
-            results['depth_score'] = 0.6
-        else:
-            results['depth_score'] = 0.3
-        
-        # 2. Back alignment using spine curvature
-        spine_analysis = AdvancedGeometricAnalyzer.calculate_spine_curvature(points)
-        results['back_straightness'] = 1.0 - spine_analysis['curvature']
-        
-        # 3. Knee tracking
-        tracking = AdvancedGeometricAnalyzer.calculate_knee_tracking_accuracy(points)
-        results['knee_tracking'] = tracking['overall']
-        
-        # 4. Overall biomechanical score
-        results['overall_score'] = (
-            results['depth_score'] * 0.4 +
-            results['back_straightness'] * 0.3 +
-            results['knee_tracking'] * 0.3
-        )
-        
-        return results
+        view = LandmarkView.of(points)
+        knee_angle = float(angles[LEFT_KNEE_ANGLE])
+        if view.is_full_body:
+            return SquatScores(*_squat_scores(view.pts, knee_angle))
+        
+        # Partial landmarks: the geometric checks fall back to their defaults
+        depth_score = _depth_score(SQUAT_DEPTH_EDGES, SQUAT_DEPTH_SCORES, knee_angle)
+        back_straightness = 1.0 - AdvancedGeometricAnalyzer.calculate_spine_curvature(view)['curvature']
+        knee_tracking = AdvancedGeometricAnalyzer.calculate_knee_tracking_accuracy(view)['overall']
+        return SquatScores(depth_score, back_straightness, knee_tracking,
+                           _squat_overall(depth_score, back_straightness, knee_tracking))
     
     @staticmethod
-    def analyze_pushup_biomechanics(points: np.ndarray, angles: Dict[str, float]) -> Dict[str, float]:
+    def analyze_pushup_biomechanics(points: Union[np.ndarray, LandmarkView], angles: np.ndarray) -> PushupScores:
         """Advanced push-up biomechanical analysis"""
-        results = {}
-        
-        # 1. Body alignment
-        alignment = AdvancedGeometricAnalyzer.calculate_body_alignment_score(points)
-        results['body_alignment'] = alignment['alignment']
-        
-        # 2. Elbow angle (depth)
-        elbow_angle = angles.get('left_elbow_angle', 180)
-        if 80 <= elbow_angle <= 100:
-            results['depth_score'] = 1.0
-        elif 70 <= elbow_angle <= 110:
-            results['depth_score'] = 0.7
-        else:
-            results['depth_score'] = 0.4
-        
-        # 3. Core engagement (estimated from body alignment)
-        results['core_engagement'] = alignment['vertical_alignment']
-        
-        # Overall score
-        results['overall_score'] = (
-            results['body_alignment'] * 0.4 +
-            results['depth_score'] * 0.4 +
-            results['core_engagement'] * 0.2
-        )
-        
-        return results
+        view = LandmarkView.of(points)
+        elbow_angle = float(angles[LEFT_ELBOW_ANGLE])
+        if view.is_full_body:
+            return PushupScores(*_pushup_scores(view.pts, elbow_angle))
+        
+        alignment = AdvancedGeometricAnalyzer.calculate_body_alignment_score(view)
+        depth_score = _depth_score(PUSHUP_DEPTH_EDGES, PUSHUP_DEPTH_SCORES, elbow_angle)
+        return PushupScores(alignment['alignment'], depth_score, alignment['vertical_alignment'],
+                            _pushup_overall(alignment['alignment'], depth_score, alignment['vertical_alignment']))
     
     @staticmethod
-    def analyze_plank_biomechanics(points: np.ndarray, angles: Dict[str, float]) -> Dict[str, float]:
+    def analyze_plank_biomechanics(points: Union[np.ndarray, LandmarkView], angles: np.ndarray) -> PlankScores:
         """Advanced plank biomechanical analysis"""
-        results = {}
-        
-        # 1. Body straightness
-        alignment = AdvancedGeometricAnalyzer.calculate_body_alignment_score(points)
-        results['body_straightness'] = alignment['vertical_alignment']
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            return PlankScores(*_plank_scores(view.pts))
         
-        # 2. Hip position (check if hips are too high or too low)
-        if len(points.reshape(-1, 3)) >= 33:
-            points_3d = points.reshape(-1, 3)
-            left_shoulder = points_3d[11]
-            left_hip = points_3d[23]
-            left_ankle = points_3d[27]
-            
-            # Calculate if body is in straight line
-            shoulder_hip = left_hip[1] - left_shoulder[1]  # y-coordinate difference
-            hip_ankle = left_ankle[1] - left_hip[1]
-            
-            # In perfect plank, these should be roughly equal
-            hip_position_score = 1.0 / (1.0 + abs(shoulder_hip - hip_ankle) * 5)
-            results['hip_position'] = hip_position_score
+        body_straightness = AdvancedGeometricAnalyzer.calculate_body_alignment_score(view)['vertical_alignment']
+        hip_position = 0.5
+        return PlankScores(body_straightness, hip_position, _plank_overall(body_straightness, hip_position))
+    
+    @staticmethod
+    def analyze(exercise_type: str, points: Union[np.ndarray, LandmarkView],
+                angles: np.ndarray) -> Union[SquatScores, PushupScores, PlankScores]:
+        """Run the biomechanical analysis for exercise_type (see SUPPORTED_EXERCISES)"""
+        analyzer = BiomechanicalAnalyzer._ANALYZERS.get(exercise_type)
+        if analyzer is None:
+            raise ValueError(f"No biomechanical analysis for exercise type: {exercise_type}")
+        return analyzer(points, angles)
+    
+    @staticmethod
+    def analyze_batch(exercise_type: str, landmarks: np.ndarray,
+                      angles: np.ndarray) -> Dict[str, np.ndarray]:
+        """Biomechanical scores for T frames at once
+        
+        landmarks is (T, 33, 3) or (T, 99); angles is the (T, len(JOINT_ANGLE_NAMES))
+        stack of per-frame joint-angle vectors.
+        Returns the per-frame analysis fields, each as a length-T array.
+        """
+        if exercise_type not in BiomechanicalAnalyzer.SUPPORTED_EXERCISES:
+            raise ValueError(f"No biomechanical analysis for exercise type: {exercise_type}")
+        
+        pts = np.asarray(landmarks, dtype=np.float64)
+        pts = pts.reshape(len(pts), -1, 3)
+        if pts.shape[1] < 33:
+            raise ValueError("analyze_batch needs all 33 pose landmarks for every frame")
+        angles = np.asarray(angles, dtype=np.float64)
+        
+        if exercise_type == 'squat':
+            fields = SquatScores._fields
+            rows = [_squat_scores(frame, angle) for frame, angle in zip(pts, angles[:, LEFT_KNEE_ANGLE])]
+        elif exercise_type == 'pushup':
+            fields = PushupScores._fields
+            rows = [_pushup_scores(frame, angle) for frame, angle in zip(pts, angles[:, LEFT_ELBOW_ANGLE])]
         else:
-            results['hip_position'] = 0.5
-        
-        # Overall score
-        results['overall_score'] = (
-            results['body_straightness'] * 0.6 +
-            results['hip_position'] * 0.4
-        )
+            fields = PlankScores._fields
+            rows = [_plank_scores(frame) for frame in pts]
         
-        return results
+        columns = np.array(rows, dtype=np.float64).reshape(len(pts), len(fields)).T
+        return dict(zip(fields, columns))
+
+
+# Exercise type -> biomechanical analysis, for BiomechanicalAnalyzer.analyze
+BiomechanicalAnalyzer._ANALYZERS = MappingProxyType({
+    'squat': BiomechanicalAnalyzer.analyze_squat_biomechanics,
+    'pushup': BiomechanicalAnalyzer.analyze_pushup_biomechanics,
+    'plank': BiomechanicalAnalyzer.analyze_plank_biomechanics
+})
+BiomechanicalAnalyzer.SUPPORTED_EXERCISES = frozenset(BiomechanicalAnalyzer._ANALYZERS)
 
 
 class KalmanFilter:
     """Simple Kalman filter for smoothing pose estimates"""
     
+    __slots__ = ('process_variance', 'measurement_variance', 'estimated_value', 'estimation_error')
+    
     def __init__(self, process_variance: float = 0.01, measurement_variance: float = 0.1):
         self.process_variance = process_variance
         self.measurement_variance = measurement_variance
@@ -432,20 +556,54 @@ class KalmanFilter:
 class AngleSmoother:
     """Smooth angle measurements using Kalman filtering"""
     
-    def __init__(self):
-        self.filters: Dict[str, KalmanFilter] = {}
+    __slots__ = ('process_variance', 'measurement_variance', '_gains', '_index', '_estimates', '_updates')
+    
+    def __init__(self, process_variance: float = 0.01, measurement_variance: float = 0.1):
+        self.process_variance = process_variance
+        self.measurement_variance = measurement_variance
+        self._gains = _kalman_gain_schedule(process_variance, measurement_variance)
+        # One scalar KalmanFilter per angle key (a name, or a vector position
+        # for smooth_vector): its estimate and how many measurements it has
+        # seen, which fixes its gain
+        self._index: Dict[Union[str, int], int] = {}
+        self._estimates = np.zeros(8)
+        self._updates = np.zeros(8, dtype=np.intp)
+    
+    def _indices_for(self, keys) -> np.ndarray:
+        """State-array slots for the given keys, adding slots for unseen keys"""
+        for key in keys:
+            if key not in self._index:
+                slot = len(self._index)
+                if slot == len(self._estimates):
+                    grow = len(self._estimates)
+                    self._estimates = np.concatenate((self._estimates, np.zeros(grow)))
+                    self._updates = np.concatenate((self._updates, np.zeros(grow, dtype=np.intp)))
+                self._index[key] = slot
+        return np.array([self._index[key] for key in keys], dtype=np.intp)
     
     def smooth_angle(self, angle_key: str, angle_value: float) -> float:
         """Smooth an angle value using Kalman filter"""
-        if angle_key not in self.filters:
-            self.filters[angle_key] = KalmanFilter()
-        
-        return self.filters[angle_key].update(angle_value)
+        return self.smooth_angles({angle_key: angle_value})[angle_key]
     
     def smooth_angles(self, angles: Dict[str, float]) -> Dict[str, float]:
         """Smooth all angles in a dictionary"""
-        smoothed = {}
-        for key, value in angles.items():
-            smoothed[key] = self.smooth_angle(key, value)
-        return smoothed
-
+        if not angles:
+            return {}
+        keys = list(angles)
+        estimates = self._update(self._indices_for(keys), np.array(list(angles.values()), dtype=np.float64))
+        return dict(zip(keys, estimates.tolist()))
+    
+    def smooth_vector(self, angles: np.ndarray) -> np.ndarray:
+        """Smooth a joint-angle vector; each position is filtered as its own angle"""
+        return self._update(self._indices_for(range(len(angles))), np.asarray(angles, dtype=np.float64))
+    
+    def _update(self, indices: np.ndarray, measurements: np.ndarray) -> np.ndarray:
+        """One Kalman update of the filters in the given slots; returns their new estimates"""
+        # Same update as KalmanFilter for every angle at once, with each angle's
+        # gain looked up from its update count (steady state once converged)
+        gains = self._gains[np.minimum(self._updates[indices], len(self._gains) - 1)]
+        estimates = self._estimates[indices]
+        estimates += gains * (measurements - estimates)
+        self._estimates[indices] = estimates
+        self._updates[indices] += 1
+        return estimates
@@ -1,13 +1,13 @@
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import os
-from dotenv import load_dotenv
+from types import MappingProxyType
 
-load_dotenv()
-
-@dataclass
+@dataclass(frozen=True)
 class WorkoutPlan:
+    __slots__ = ('exercise_name', 'sets', 'reps', 'duration', 'difficulty', 'instructions', 'target_muscles')
+    
     exercise_name: str
     sets: int
     reps: int
@@ -16,8 +16,10 @@ class WorkoutPlan:
     instructions: str
     target_muscles: List[str]
 
-@dataclass
+@dataclass(frozen=True)
 class NutritionAdvice:
+    __slots__ = ('meal_type', 'food_items', 'calories', 'macronutrients', 'timing', 'benefits')
+    
     meal_type: str
     food_items: List[str]
     calories: int
@@ -25,12 +27,163 @@ class NutritionAdvice:
     timing: str
     benefits: List[str]
 
+# Exercise reference data, shared read-only by every advisor instance
+_EXERCISE_DATABASE = MappingProxyType({
+    'squat': {
+        'muscles': ['quadriceps', 'glutes', 'hamstrings', 'core'],
+        'difficulty': 'beginner',
+        'equipment': 'bodyweight',
+        'benefits': ['strength', 'mobility', 'functional movement']
+    },
+    'pushup': {
+        'muscles': ['chest', 'shoulders', 'triceps', 'core'],
+        'difficulty': 'beginner',
+        'equipment': 'bodyweight',
+        'benefits': ['upper body strength', 'core stability']
+    },
+    'plank': {
+        'muscles': ['core', 'shoulders', 'glutes'],
+        'difficulty': 'beginner',
+        'equipment': 'bodyweight',
+        'benefits': ['core strength', 'stability', 'endurance']
+    },
+    'lunge': {
+        'muscles': ['quadriceps', 'glutes', 'hamstrings', 'calves'],
+        'difficulty': 'beginner',
+        'equipment': 'bodyweight',
+        'benefits': ['leg strength', 'balance', 'mobility']
+    },
+    'deadlift': {
+        'muscles': ['hamstrings', 'glutes', 'lower back', 'traps'],
+        'difficulty': 'intermediate',
+        'equipment': 'barbell',
+        'benefits': ['posterior chain strength', 'functional movement']
+    }
+})
+
+# Fallback workout plans, shared by every request instead of rebuilt per call
+_BEGINNER_WORKOUT_PLAN: Tuple[WorkoutPlan, ...] = (
+    WorkoutPlan(
+        exercise_name="Bodyweight Squats",
+        sets=3,
+        reps=10,
+        duration=None,
+        difficulty="beginner",
+        instructions="Stand with feet shoulder-width apart, lower down as if sitting in a chair, then return to standing.",
+        target_muscles=["quadriceps", "glutes", "hamstrings"]
+    ),
+    WorkoutPlan(
+        exercise_name="Push-ups",
+        sets=3,
+        reps=8,
+        duration=None,
+        difficulty="beginner",
+        instructions="Start in plank position, lower chest to ground, push back up.",
+        target_muscles=["chest", "shoulders", "triceps"]
+    ),
+    WorkoutPlan(
+        exercise_name="Plank",
+        sets=3,
+        reps=1,
+        duration=30,
+        difficulty="beginner",
+        instructions="Hold plank position, keeping body straight from head to heels.",
+        target_muscles=["core", "shoulders"]
+    )
+)
+
+_INTERMEDIATE_WORKOUT_PLAN: Tuple[WorkoutPlan, ...] = (
+    WorkoutPlan(
+        exercise_name="Jump Squats",
+        sets=4,
+        reps=12,
+        duration=None,
+        difficulty="intermediate",
+        instructions="Perform squats with explosive jump at the top.",
+        target_muscles=["quadriceps", "glutes", "calves"]
+    ),
+    WorkoutPlan(
+        exercise_name="Diamond Push-ups",
+        sets=4,
+        reps=10,
+        duration=None,
+        difficulty="intermediate",
+        instructions="Push-ups with hands in diamond shape under chest.",
+        target_muscles=["chest", "triceps", "shoulders"]
+    ),
+    WorkoutPlan(
+        exercise_name="Mountain Climbers",
+        sets=4,
+        reps=20,
+        duration=None,
+        difficulty="intermediate",
+        instructions="Alternate bringing knees to chest in plank position.",
+        target_muscles=["core", "shoulders", "legs"]
+    )
+)
+
+_WORKOUT_PLANS_BY_LEVEL = MappingProxyType({
+    'beginner': _BEGINNER_WORKOUT_PLAN,
+    'intermediate': _INTERMEDIATE_WORKOUT_PLAN
+})
+
+# Fallback nutrition advice per meal type, shared by every request
+_BREAKFAST_NUTRITION_ADVICE: Tuple[NutritionAdvice, ...] = (
+    NutritionAdvice(
+        meal_type="breakfast",
+        food_items=["oatmeal", "banana", "almonds", "greek yogurt"],
+        calories=400,
+        macronutrients={"protein": 25, "carbs": 45, "fat": 15},
+        timing="Within 1 hour of waking",
+        benefits=["sustained energy", "muscle recovery", "fiber intake"]
+    ),
+)
+
+_POST_WORKOUT_NUTRITION_ADVICE: Tuple[NutritionAdvice, ...] = (
+    NutritionAdvice(
+        meal_type="post_workout",
+        food_items=["protein shake", "banana", "almond butter"],
+        calories=350,
+        macronutrients={"protein": 30, "carbs": 35, "fat": 12},
+        timing="Within 30 minutes of workout",
+        benefits=["muscle recovery", "glycogen replenishment", "protein synthesis"]
+    ),
+)
+
+_GENERAL_NUTRITION_ADVICE: Tuple[NutritionAdvice, ...] = (
+    NutritionAdvice(
+        meal_type="general",
+        food_items=["grilled chicken", "quinoa", "mixed vegetables"],
+        calories=500,
+        macronutrients={"protein": 35, "carbs": 40, "fat": 20},
+        timing="Main meal",
+        benefits=["balanced nutrition", "muscle maintenance", "vitamin intake"]
+    ),
+)
+
+_NUTRITION_ADVICE_BY_MEAL = MappingProxyType({
+    'breakfast': _BREAKFAST_NUTRITION_ADVICE,
+    'post_workout': _POST_WORKOUT_NUTRITION_ADVICE
+})
+
+# Fallback form feedback per score tier (see _form_feedback_tier)
+_FORM_FEEDBACK_BY_TIER = (
+    "Let's work on improving your form. Focus on the corrections provided and practice slowly to build muscle memory.",
+    "Good form overall! Focus on the suggested corrections to perfect your technique.",
+    "Excellent form! You're performing the exercise with great technique. Keep up the good work!"
+)
+
+def _form_feedback_tier(form_score: float) -> int:
+    """Index of the form feedback tier for a form score: <= 0.6, <= 0.8, above"""
+    return 0 if form_score <= 0.6 else 1 if form_score <= 0.8 else 2
+
 class VirtualCoachAdvisor:
     """Virtual fitness and nutrition advisor (API/LLM-integrated)"""
     
     def __init__(self):
-        # Initialize generic API client (set OPENAI_API_KEY in .env)
-        api_key = os.getenv("OPENAI_API_KEY")
+        # Initialize generic API client (set OPENAI_API_KEY in .env; the app
+        # entrypoint loads it into the environment)
+        api_key = os.environ.get("OPENAI_API_KEY")
         if api_key and api_key != "your-api-key-here":
             # Replace with generic client setup if applicable
             self.client = None  # TODO: Add client initialization
@@ -39,44 +192,13 @@ class VirtualCoachAdvisor:
             self.client = None
             self.has_api_key = False
             print("⚠️  OPENAI_API_KEY not set. Using fallback responses.")
-        self.exercise_database = {
-            'squat': {
-                'muscles': ['quadriceps', 'glutes', 'hamstrings', 'core'],
-                'difficulty': 'beginner',
-                'equipment': 'bodyweight',
-                'benefits': ['strength', 'mobility', 'functional movement']
-            },
-            'pushup': {
-                'muscles': ['chest', 'shoulders', 'triceps', 'core'],
-                'difficulty': 'beginner',
-                'equipment': 'bodyweight',
-                'benefits': ['upper body strength', 'core stability']
-            },
-            'plank': {
-                'muscles': ['core', 'shoulders', 'glutes'],
-                'difficulty': 'beginner',
-                'equipment': 'bodyweight',
-                'benefits': ['core strength', 'stability', 'endurance']
-            },
-            'lunge': {
-                'muscles': ['quadriceps', 'glutes', 'hamstrings', 'calves'],
-                'difficulty': 'beginner',
-                'equipment': 'bodyweight',
-                'benefits': ['leg strength', 'balance', 'mobility']
-            },
-            'deadlift': {
-                'muscles': ['hamstrings', 'glutes', 'lower back', 'traps'],
-                'difficulty': 'intermediate',
-                'equipment': 'barbell',
-                'benefits': ['posterior chain strength', 'functional movement']
-            }
-        }
+        self.exercise_database = _EXERCISE_DATABASE
 
     def generate_workout_plan(self, 
                               user_profile: Dict[str, any], 
                               goals: List[str],
                               available_equipment: List[str] = None,
-                              workout_duration: int = 30) -> List[WorkoutPlan]:
+                              workout_duration: int = 30) -> Tuple[WorkoutPlan, ...]:
         """Generate personalized workout plan based on user profile and goals"""
         if available_equipment is None:
             available_equipment = ['bodyweight']
@@ -88,7 +210,7 @@ class VirtualCoachAdvisor:
     def generate_nutrition_advice(self, 
                                   user_profile: Dict[str, any],
                                   dietary_restrictions: List[str] = None,
-                                  meal_type: str = 'general') -> List[NutritionAdvice]:
+                                  meal_type: str = 'general') -> Tuple[NutritionAdvice, ...]:
         """Generate personalized nutrition advice"""
         if dietary_restrictions is None:
             dietary_restrictions = []
@@ -104,110 +226,38 @@ class VirtualCoachAdvisor:
         # Integrate with external API/service here if available
         return self._get_default_form_feedback(form_score, corrections)
 
-    def _get_default_workout_plan(self, fitness_level: str) -> List[WorkoutPlan]:
+    def _get_default_workout_plan(self, fitness_level: str) -> Tuple[WorkoutPlan, ...]:
         """Fallback workout plan when external service is unavailable"""
-        if fitness_level == 'beginner':
-            return [
-                WorkoutPlan(
-                    exercise_name="Bodyweight Squats",
-                    sets=3,
-                    reps=10,
-                    duration=None,
-                    difficulty="beginner",
-                    instructions="Stand with feet shoulder-width apart, lower down as if sitting in a chair, then return to standing.",
-                    target_muscles=["quadriceps", "glutes", "hamstrings"]
-                ),
-                WorkoutPlan(
-                    exercise_name="Push-ups",
-                    sets=3,
-                    reps=8,
-                    duration=None,
-                    difficulty="beginner",
-                    instructions="Start in plank position, lower chest to ground, push back up.",
-                    target_muscles=["chest", "shoulders", "triceps"]
-                ),
-                WorkoutPlan(
-                    exercise_name="Plank",
-                    sets=3,
-                    reps=1,
-                    duration=30,
-                    difficulty="beginner",
-                    instructions="Hold plank position, keeping body straight from head to heels.",
-                    target_muscles=["core", "shoulders"]
-                )
-            ]
-        else:
-            return [
-                WorkoutPlan(
-                    exercise_name="Jump Squats",
-                    sets=4,
-                    reps=12,
-                    duration=None,
-                    difficulty="intermediate",
-                    instructions="Perform squats with explosive jump at the top.",
-                    target_muscles=["quadriceps", "glutes", "calves"]
-                ),
-                WorkoutPlan(
-                    exercise_name="Diamond Push-ups",
-                    sets=4,
-                    reps=10,
-                    duration=None,
-                    difficulty="intermediate",
-                    instructions="Push-ups with hands in diamond shape under chest.",
-                    target_muscles=["chest", "triceps", "shoulders"]
-                ),
-                WorkoutPlan(
-                    exercise_name="Mountain Climbers",
-                    sets=4,
-                    reps=20,
-                    duration=None,
-                    difficulty="intermediate",
-                    instructions="Alternate bringing knees to chest in plank position.",
-                    target_muscles=["core", "shoulders", "legs"]
-                )
-            ]
-
-    def _get_default_nutrition_advice(self, meal_type: str) -> List[NutritionAdvice]:
+        return _WORKOUT_PLANS_BY_LEVEL.get(fitness_level, _INTERMEDIATE_WORKOUT_PLAN)
+
+    def _get_default_nutrition_advice(self, meal_type: str) -> Tuple[NutritionAdvice, ...]:
         """Fallback nutrition advice when external service is unavailable"""
-        if meal_type == 'breakfast':
-            return [
-                NutritionAdvice(
-                    meal_type="breakfast",
-                    food_items=["oatmeal", "banana", "almonds", "greek yogurt"],
-                    calories=400,
-                    macronutrients={"protein": 25, "carbs": 45, "fat": 15},
-                    timing="Within 1 hour of waking",
-                    benefits=["sustained energy", "muscle recovery", "fiber intake"]
-                )
-            ]
-        elif meal_type == 'post_workout':
-            return [
-                NutritionAdvice(
-                    meal_type="post_workout",
-                    food_items=["protein shake", "banana", "almond butter"],
-                    calories=350,
-                    macronutrients={"protein": 30, "carbs": 35, "fat": 12},
-                    timing="Within 30 minutes of workout",
-                    benefits=["muscle recovery", "glycogen replenishment", "protein synthesis"]
-                )
-            ]
-        else:
-            return [
-                NutritionAdvice(
-                    meal_type="general",
-                    food_items=["grilled chicken", "quinoa", "mixed vegetables"],
-                    calories=500,
-                    macronutrients={"protein": 35, "carbs": 40, "fat": 20},
-                    timing="Main meal",
-                    benefits=["balanced nutrition", "muscle maintenance", "vitamin intake"]
-                )
-            ]
+        return _NUTRITION_ADVICE_BY_MEAL.get(meal_type, _GENERAL_NUTRITION_ADVICE)
 
     def _get_default_form_feedback(self, form_score: float, corrections: List[str]) -> str:
         """Fallback form feedback when external service is unavailable"""
-        if form_score > 0.8:
-            return "Excellent form! You're performing the exercise with great technique. Keep up the good work!"
-        elif form_score > 0.6:
-            return "Good form overall! Focus on the suggested corrections to perfect your technique."
-        else:
-            return "Let's work on improving your form. Focus on the corrections provided and practice slowly to build muscle memory."
+        return _FORM_FEEDBACK_BY_TIER[_form_feedback_tier(form_score)]
+
+
+class FormFeedbackCache:
+    """Form feedback from an advisor, memoized on (exercise, score tier, correction set)
+    
+    Feedback only changes across the score tiers, so that is the granularity
+    it is cached at; the cache is cleared once it holds max_size entries.
+    """
+    
+    def __init__(self, advisor: VirtualCoachAdvisor, max_size: int = 2048):
+        self.advisor = advisor
+        self.max_size = max_size
+        self._cache: Dict[tuple, str] = {}
+    
+    def get(self, exercise_type: str, form_score: float, corrections: List[str]) -> str:
+        """Feedback for a form score, as advisor.analyze_form_feedback gives it"""
+        key = (exercise_type, _form_feedback_tier(form_score), tuple(sorted(corrections)))
+        feedback = self._cache.get(key)
+        if feedback is None:
+            feedback = self.advisor.analyze_form_feedback(exercise_type, form_score, list(corrections))
+            if len(self._cache) >= self.max_size:
+                self._cache.clear()
+            self._cache[key] = feedback
+        return feedback
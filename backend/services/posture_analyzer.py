@@ -1,28 +1,385 @@
+import os
 import cv2
+import functools
+import math
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
 import mediapipe as mp
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Optional, Union
 import json
 from dataclasses import dataclass
-from mediapipe.framework.formats import landmark_pb2
+from types import MappingProxyType
 try:
     from .advanced_analysis import (
         AdvancedGeometricAnalyzer,
         BiomechanicalAnalyzer,
+        LandmarkView,
         TemporalAnalyzer,
-        AngleSmoother
+        AngleSmoother,
+        JOINT_ANGLE_NAMES,
+        LEFT_KNEE_ANGLE,
+        LEFT_ELBOW_ANGLE,
+        _band_score,
+        _spine_straightness,
+        _hip_hinge_angle
     )
 except ImportError:
     # Fallback if advanced_analysis is not available
     from advanced_analysis import (
         AdvancedGeometricAnalyzer,
         BiomechanicalAnalyzer,
+        LandmarkView,
         TemporalAnalyzer,
-        AngleSmoother
+        AngleSmoother,
+        JOINT_ANGLE_NAMES,
+        LEFT_KNEE_ANGLE,
+        LEFT_ELBOW_ANGLE,
+        _band_score,
+        _spine_straightness,
+        _hip_hinge_angle
     )
 
-@dataclass
+# Batch analysis parallelizes across frames (PostureAnalyzer.analyze_batch), so
+# OpenCV stays single-threaded within a frame; KINETIQ_CV_THREADS overrides it.
+# OMP_NUM_THREADS / MKL_NUM_THREADS are deployment settings (IMPLEMENTATION_GUIDE.md)
+cv2.setNumThreads(int(os.environ.get('KINETIQ_CV_THREADS', '1')))
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; fall back to plain Python kernels
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Kernels compile in warmup() rather than loading from numba's on-disk cache:
+# cache entries are keyed by file, not import name, so one compiled under
+# services.posture_analyzer breaks imports as backend.services.posture_analyzer
+@njit(fastmath=True)
+def _joint_angle(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> float:
+    """Angle at b (degrees) formed by a-b-c; NaN if a segment has zero length"""
+    v1x, v1y, v1z = a[0] - b[0], a[1] - b[1], a[2] - b[2]
+    v2x, v2y, v2z = c[0] - b[0], c[1] - b[1], c[2] - b[2]
+    if (v1x == 0.0 and v1y == 0.0 and v1z == 0.0) or (v2x == 0.0 and v2y == 0.0 and v2z == 0.0):
+        return math.nan
+    # atan2(|v1 x v2|, v1 . v2) stays accurate near 0 and 180 degrees, no clipping needed
+    cx = v1y * v2z - v1z * v2y
+    cy = v1z * v2x - v1x * v2z
+    cz = v1x * v2y - v1y * v2x
+    cross_norm = math.sqrt(cx * cx + cy * cy + cz * cz)
+    return math.degrees(math.atan2(cross_norm, v1x * v2x + v1y * v2y + v1z * v2z))
+
+# Score bands as inclusive distances from the ideal joint angle -> score per band,
+# like SQUAT_DEPTH_EDGES; front knee scores are already weighted (40% of a lunge)
+LUNGE_FRONT_KNEE_EDGES = np.array([5.0, 15.0, 25.0, 35.0])  # around 90 degrees
+LUNGE_FRONT_KNEE_SCORES = np.array([0.4, 0.3, 0.2, 0.1, 0.0])
+LUNGE_BACK_KNEE_EDGES = np.array([10.0, 20.0])  # around 90 degrees
+LUNGE_BACK_KNEE_SCORES = np.array([1.0, 0.7, 0.4])
+HIP_HINGE_EDGES = np.array([20.0, 40.0])  # around 140 degrees
+HIP_HINGE_SCORES = np.array([1.0, 0.7, 0.4])
+
+@njit
+def _lunge_score(points: np.ndarray) -> float:
+    """Lunge form score (0-1) from full-body landmarks"""
+    score = 0.0
+    
+    # 1. Front knee angle (40% of exercise score), left leg as front leg
+    front_knee_angle = _joint_angle(points[23], points[25], points[27])
+    if not math.isnan(front_knee_angle):
+        score += _band_score(LUNGE_FRONT_KNEE_EDGES, LUNGE_FRONT_KNEE_SCORES, abs(front_knee_angle - 90.0))
+    else:
+        score += LUNGE_FRONT_KNEE_SCORES[0]  # Default 90 degrees
+    
+    # 2. Back knee position (30% of exercise score), right leg bent 80-100 degrees
+    back_knee_angle = _joint_angle(points[24], points[26], points[28])
+    if not math.isnan(back_knee_angle):
+        score += _band_score(LUNGE_BACK_KNEE_EDGES, LUNGE_BACK_KNEE_SCORES, abs(back_knee_angle - 90.0)) * 0.3
+    else:
+        score += 0.7 * 0.3
+    
+    # 3. Torso alignment (30% of exercise score)
+    score += _spine_straightness(points) * 0.3
+    
+    return score
+
+@njit
+def _deadlift_score(points: np.ndarray) -> float:
+    """Deadlift back (50%) and hip hinge (30%) score from full-body landmarks"""
+    score = _spine_straightness(points) * 0.5
+    
+    # Good hip hinge angle is typically between 120-160 degrees
+    score += _band_score(HIP_HINGE_EDGES, HIP_HINGE_SCORES, abs(_hip_hinge_angle(points) - 140.0)) * 0.3
+    
+    return score
+
+# Landmarks for each JOINT_ANGLE_NAMES entry: the angle at vertex formed by end_a-vertex-end_b
+JOINT_ANGLE_IDX = np.array([
+    [23, 24, 11, 12],  # end_a: hips, shoulders
+    [25, 26, 13, 14],  # vertex: knees, elbows
+    [27, 28, 15, 16]   # end_b: ankles, wrists
+], dtype=np.intp)
+
+@njit
+def _joint_angles(points: np.ndarray) -> np.ndarray:
+    """Every JOINT_ANGLE_IDX angle (degrees) of full-body landmarks; NaN for zero-length segments"""
+    angles = np.empty(JOINT_ANGLE_IDX.shape[1])
+    for k in range(JOINT_ANGLE_IDX.shape[1]):
+        a, b, c = JOINT_ANGLE_IDX[0, k], JOINT_ANGLE_IDX[1, k], JOINT_ANGLE_IDX[2, k]
+        v1x, v1y, v1z = points[a, 0] - points[b, 0], points[a, 1] - points[b, 1], points[a, 2] - points[b, 2]
+        v2x, v2y, v2z = points[c, 0] - points[b, 0], points[c, 1] - points[b, 1], points[c, 2] - points[b, 2]
+        if (v1x == 0.0 and v1y == 0.0 and v1z == 0.0) or (v2x == 0.0 and v2y == 0.0 and v2z == 0.0):
+            angles[k] = math.nan
+            continue
+        cx = v1y * v2z - v1z * v2y
+        cy = v1z * v2x - v1x * v2z
+        cz = v1x * v2y - v1y * v2x
+        angles[k] = math.degrees(math.atan2(
+            math.sqrt(cx * cx + cy * cy + cz * cz), v1x * v2x + v1y * v2y + v1z * v2z
+        ))
+    return angles
+
+# MediaPipe Pose landmark names, in landmark index order
+LANDMARK_NAMES = (
+    'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer',
+    'right_eye_inner', 'right_eye', 'right_eye_outer',
+    'left_ear', 'right_ear', 'mouth_left', 'mouth_right',
+    'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
+    'left_index', 'right_index', 'left_thumb', 'right_thumb',
+    'left_hip', 'right_hip', 'left_knee', 'right_knee',
+    'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
+    'left_foot_index', 'right_foot_index'
+)
+
+# Landmarks scored by _calculate_visibility_score: shoulders, hips, knees, ankles
+VISIBILITY_KEY_IDX = np.array([11, 12, 23, 24, 25, 26, 27, 28])
+
+# Body parts checked by _check_body_visibility: MediaPipe indices and the feedback when cut off
+BODY_PARTS = (
+    ('head', np.array([0]),  # nose
+     "Your head is not fully visible. Move back or adjust camera angle."),
+    ('shoulders', np.array([11, 12]),  # left and right shoulders
+     "Your shoulders are cut off. Move back to show your full upper body."),
+    ('arms', np.array([13, 14, 15, 16]),  # elbows and wrists
+     "Your arms are not fully visible. Extend your arms or move back."),
+    ('hips', np.array([23, 24]),  # left and right hips
+     "Your hips are not visible. Make sure your torso is in frame."),
+    ('legs', np.array([25, 26, 27, 28]),  # knees and ankles
+     "Your legs are cut off. Move back to show your full lower body."),
+    ('feet', np.array([29, 30, 31, 32]),  # heels and foot index
+     "Your feet are not visible. Make sure your entire body is in frame.")
+)
+
+# BODY_PARTS indices flattened into one gather, with each part's offset for np.add.reduceat
+BODY_PART_IDX = np.concatenate([indices for _, indices, _ in BODY_PARTS])
+BODY_PART_STARTS = np.cumsum([0] + [len(indices) for _, indices, _ in BODY_PARTS[:-1]])
+
+# Corrections suggested per exercise when the form score is below 0.7
+FORM_CORRECTIONS = MappingProxyType({
+    'squat': (
+        "Keep your back straight and chest up",
+        "Ensure knees track over toes"
+    ),
+    'pushup': (
+        "Keep your body in a straight line",
+        "Lower chest closer to the ground",
+        "Push through your palms, not fingertips"
+    ),
+    'plank': (
+        "Keep your body straight from head to heels",
+        "Engage your core muscles",
+        "Don't let hips sag or pike up"
+    ),
+    'lunge': (
+        "Keep front knee over ankle",
+        "Lower back knee toward ground",
+        "Maintain upright torso"
+    ),
+    'deadlift': (
+        "Keep your back straight throughout the movement",
+        "Hinge at hips, not waist",
+        "Keep the bar close to your body"
+    )
+})
+
+# Skeleton edges drawn by draw_pose_landmarks, as an (E, 2) landmark index table
+POSE_CONNECTIONS = np.array(sorted(mp.solutions.pose.POSE_CONNECTIONS), dtype=np.intp)
+POSE_DRAWING_COLOR = (0, 255, 0)
+POSE_LANDMARK_BORDER_COLOR = (224, 224, 224)  # mp_drawing's default landmark border
+
+# Longest image side handed to MediaPipe; BlazePose itself runs on 256x256
+# crops, so larger frames only cost color conversion and resize bandwidth
+POSE_INPUT_MAX_SIDE = 512
+
+_NO_VISIBILITIES = np.empty(0, dtype=np.float32)
+
+# Streaming frames whose 64-bit difference hashes differ in at most this many
+# bits are treated as duplicates and reuse the previous frame's analysis
+DUPLICATE_FRAME_MAX_BITS = 2
+
+def _dhash(image: np.ndarray) -> int:
+    """64-bit difference hash of an image: sign of horizontal gradients on a 9x8 thumbnail"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(thumb[:, 1:] > thumb[:, :-1]).tobytes(), 'big')
+
+class _LandmarkList(NamedTuple):
+    landmark: Sequence
+
+class _PoseResults(NamedTuple):
+    pose_landmarks: Optional[_LandmarkList]
+
+class _PoseLandmarkerGraph:
+    """MediaPipe Tasks PoseLandmarker on the GPU or CPU (XNNPACK) delegate, behind mp.solutions.pose's process()"""
+    __slots__ = ('_options', '_landmarker', '_streaming', '_timestamp_ms')
+    
+    def __init__(self, model_path: str, streaming: bool, delegate: str = 'gpu'):
+        from mediapipe.tasks.python import BaseOptions, vision
+        
+        options = vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(
+                model_asset_path=model_path,
+                delegate=BaseOptions.Delegate.CPU if delegate == 'cpu' else BaseOptions.Delegate.GPU
+            ),
+            running_mode=vision.RunningMode.VIDEO if streaming else vision.RunningMode.IMAGE,
+            num_poses=1,
+            min_pose_detection_confidence=0.3,
+            min_tracking_confidence=0.3
+        )
+        self._options = options
+        self._landmarker = vision.PoseLandmarker.create_from_options(options)
+        self._streaming = streaming
+        self._timestamp_ms = 0
+    
+    def reset(self):
+        """Drop the tracked pose, like mp.solutions.pose.Pose.reset()"""
+        from mediapipe.tasks.python import vision
+        
+        self._landmarker.close()
+        self._landmarker = vision.PoseLandmarker.create_from_options(self._options)
+        self._timestamp_ms = 0
+    
+    def process(self, rgb_image: np.ndarray) -> _PoseResults:
+        """Detect the pose in an RGB frame"""
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_image)
+        if self._streaming:
+            # Video mode needs increasing timestamps; frames are assumed ~30 fps apart
+            self._timestamp_ms += 33
+            result = self._landmarker.detect_for_video(image, self._timestamp_ms)
+        else:
+            result = self._landmarker.detect(image)
+        if not result.pose_landmarks:
+            return _PoseResults(None)
+        return _PoseResults(_LandmarkList(result.pose_landmarks[0]))
+
+def _new_pose(static_image_mode: bool):
+    """Build a MediaPipe Pose graph with the analyzer's detection settings
+    
+    Set KINETIQ_POSE_MODEL to a pose_landmarker .task file to run it through
+    the Tasks API, on the GPU (which affords the full or heavy model) or, with
+    KINETIQ_POSE_DELEGATE=cpu, straight on XNNPACK without the legacy
+    solutions wrapper. Otherwise, or if the landmarker cannot start, the
+    CPU lite model runs through mp.solutions.pose.
+    """
+    model_path = os.environ.get('KINETIQ_POSE_MODEL')
+    if model_path:
+        delegate = os.environ.get('KINETIQ_POSE_DELEGATE', 'gpu').lower()
+        try:
+            return _PoseLandmarkerGraph(model_path, streaming=not static_image_mode, delegate=delegate)
+        except Exception as e:
+            print(f"Pose landmarker ({delegate}) unavailable, using CPU pose model: {e}")
+    return mp.solutions.pose.Pose(
+        static_image_mode=static_image_mode,
+        model_complexity=0,      # Faster, less accurate
+        enable_segmentation=False,
+        min_detection_confidence=0.3,  # Lower threshold for better detection
+        min_tracking_confidence=0.3
+    )
+
+@functools.lru_cache(maxsize=None)
+def _get_shared_pose():
+    """Static-image Pose graph shared by every static analyzer, built once per process
+    
+    Returned with the lock that serializes process() calls on it across
+    analyzers. Streaming graphs carry one stream's tracking state, so they
+    are never shared.
+    """
+    return _new_pose(static_image_mode=True), threading.Lock()
+
+class _PoseWorker:
+    """A Pose graph with its reusable RGB and landmark buffers; one per thread"""
+    __slots__ = ('pose', '_lock', '_rgb_buffer', '_landmark_buffer')
+    
+    def __init__(self, pose, lock: Optional[threading.Lock] = None):
+        self.pose = pose
+        # Held around process(); shared with every other worker on the same graph
+        self._lock = lock if lock is not None else threading.Lock()
+        # RGB conversion target, reallocated only when the frame size or dtype changes
+        self._rgb_buffer: Optional[np.ndarray] = None
+        # x, y, z, visibility per landmark, refilled in place for every frame
+        self._landmark_buffer = np.empty((33, 4), dtype=np.float32)
+    
+    def process(self, image: np.ndarray) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """(33, 3) landmarks and their visibilities, or (None, empty) if no pose was found"""
+        # Guarantee a contiguous 3-channel BGR buffer (grayscale uploads, sliced views)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        else:
+            image = np.ascontiguousarray(image)
+        
+        # Landmarks come back normalized, so a smaller frame changes nothing downstream
+        height, width = image.shape[:2]
+        scale = POSE_INPUT_MAX_SIDE / max(height, width)
+        if scale < 1:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        rgb_buffer = self._rgb_buffer
+        if rgb_buffer is None or rgb_buffer.shape != image.shape or rgb_buffer.dtype != image.dtype:
+            self._rgb_buffer = np.empty_like(image)
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
+        # A read-only frame is wrapped by reference instead of copied into the
+        # graph's input packet; process() is done with it once it returns
+        rgb_image.flags.writeable = False
+        try:
+            with self._lock:
+                results = self.pose.process(rgb_image)
+        finally:
+            rgb_image.flags.writeable = True
+        
+        if not results.pose_landmarks:
+            return None, _NO_VISIBILITIES
+        buffer = self._landmark_buffer
+        # One bulk assignment instead of a per-landmark row write
+        buffer[:] = [
+            (landmark.x, landmark.y, landmark.z, landmark.visibility)
+            for landmark in results.pose_landmarks.landmark
+        ]
+        # Callers keep the landmarks across frames, so hand out copies
+        return buffer[:, :3].astype(np.float64), buffer[:, 3].copy()
+
+# Batch detection workers, each with its own static-image Pose graph
+_thread_workers = threading.local()
+
+def _detect_pose(image: np.ndarray) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """Run pose detection on the calling thread's own worker"""
+    worker = getattr(_thread_workers, 'worker', None)
+    if worker is None:
+        worker = _thread_workers.worker = _PoseWorker(_new_pose(static_image_mode=True))
+    try:
+        return worker.process(image)
+    except Exception as e:
+        print(f"Error extracting pose landmarks: {e}")
+        return None, _NO_VISIBILITIES
+
+@dataclass(frozen=True)
 class PostureAnalysis:
+    __slots__ = ('exercise_type', 'confidence', 'form_score', 'corrections', 'key_points', 'is_correct_form')
+    
     exercise_type: str
     confidence: float
     form_score: float
@@ -33,17 +390,25 @@ class PostureAnalysis:
 class PostureAnalyzer:
     """Computer vision system for real-time posture analysis using MediaPipe and PyTorch"""
     
-    def __init__(self):
+    def __init__(self, streaming: bool = False):
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=True,  # Better for single image analysis
-            model_complexity=0,      # Faster, less accurate
-            enable_segmentation=False,
-            min_detection_confidence=0.3,  # Lower threshold for better detection
-            min_tracking_confidence=0.3
-        )
+        # Static image mode runs the detector on every image; streaming mode
+        # tracks the pose from the previous frame and skips most detections,
+        # so it is only for consecutive frames of one video or camera feed,
+        # and each streaming analyzer owns its graph
+        self.streaming = streaming
+        if streaming:
+            self._pose_worker = _PoseWorker(_new_pose(static_image_mode=False))
+        else:
+            self._pose_worker = _PoseWorker(*_get_shared_pose())
         self.mp_drawing = mp.solutions.drawing_utils
-        self._last_landmark_visibilities: List[float] = []
+        self._last_landmark_visibilities = _NO_VISIBILITIES
+        # Thread pool for analyze_batch, started on first use
+        self._batch_pool: Optional[ThreadPoolExecutor] = None
+        # Last streaming frame's hash, exercise and analysis, for duplicate-frame gating
+        self._last_frame_hash: Optional[int] = None
+        self._last_exercise_type: Optional[str] = None
+        self._last_result: Optional[PostureAnalysis] = None
         
         # Advanced analysis components
         self.temporal_analyzer = TemporalAnalyzer(window_size=10)
@@ -84,96 +449,52 @@ class PostureAnalyzer:
         }
     
     
+    def warmup(self):
+        """Initialize the MediaPipe graph and compile JIT kernels ahead of the first request"""
+        self.extract_pose_landmarks(np.zeros((256, 256, 3), dtype=np.uint8))
+        dummy_points = np.linspace(0.0, 1.0, 33 * 3).reshape(33, 3)
+        self.calculate_angles(dummy_points)
+        _lunge_score(dummy_points)
+        _deadlift_score(dummy_points)
+        for exercise_type in BiomechanicalAnalyzer.SUPPORTED_EXERCISES:
+            self.biomechanical_analyzer.analyze(exercise_type, dummy_points, np.full(len(JOINT_ANGLE_NAMES), 90.0))
+    
+    @property
+    def pose(self):
+        """MediaPipe Pose graph used for single-frame analysis"""
+        return self._pose_worker.pose
+    
     def extract_pose_landmarks(self, image: np.ndarray) -> Optional[np.ndarray]:
-        """Extract pose landmarks from image using MediaPipe"""
+        """Extract pose landmarks from image using MediaPipe, as a (33, 3) x/y/z array"""
         try:
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(rgb_image)
-            
-            if results.pose_landmarks:
-                landmarks = []
-                self._last_landmark_visibilities = []
-                for landmark in results.pose_landmarks.landmark:
-                    landmarks.extend([landmark.x, landmark.y, landmark.z])
-                    self._last_landmark_visibilities.append(landmark.visibility)
-                return np.array(landmarks)
-            self._last_landmark_visibilities = []
-            return None
+            landmarks, self._last_landmark_visibilities = self._pose_worker.process(image)
+            return landmarks
         except Exception as e:
             print(f"Error extracting pose landmarks: {e}")
-            self._last_landmark_visibilities = []
+            self._last_landmark_visibilities = _NO_VISIBILITIES
             return None
     
-    def calculate_angles(self, landmarks: np.ndarray) -> Dict[str, float]:
-        """Calculate joint angles from pose landmarks"""
-        angles = {}
+    def calculate_angles(self, landmarks: np.ndarray) -> np.ndarray:
+        """Joint angles from (33, 3) pose landmarks, laid out as JOINT_ANGLE_NAMES
         
-        # Convert landmarks to 3D points
-        points = landmarks.reshape(-1, 3)
+        Angles that cannot be measured (missing landmarks, zero-length
+        segments) are NaN; use angles_to_dict for a {name: angle} form.
+        """
+        if len(landmarks) < 33:
+            return np.full(len(JOINT_ANGLE_NAMES), np.nan)
         
-        if len(points) >= 33:
-            # Left leg angles
-            if len(points) > 27:
-                hip = points[23]  # Left hip
-                knee = points[25]  # Left knee
-                ankle = points[27]  # Left ankle
-                
-                # Calculate knee angle
-                v1 = hip - knee
-                v2 = ankle - knee
-                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                angle = np.degrees(np.arccos(cos_angle))
-                angles['left_knee_angle'] = angle
-            
-            # Right leg angles
-            if len(points) > 28:
-                hip = points[24]  # Right hip
-                knee = points[26]  # Right knee
-                ankle = points[28]  # Right ankle
-                
-                # Calculate knee angle
-                v1 = hip - knee
-                v2 = ankle - knee
-                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                angle = np.degrees(np.arccos(cos_angle))
-                angles['right_knee_angle'] = angle
-            
-            # Left arm angles (for push-ups)
-            if len(points) > 15:
-                shoulder = points[11]  # Left shoulder
-                elbow = points[13]  # Left elbow
-                wrist = points[15]  # Left wrist
-                
-                # Calculate elbow angle
-                v1 = shoulder - elbow
-                v2 = wrist - elbow
-                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                angle = np.degrees(np.arccos(cos_angle))
-                angles['left_elbow_angle'] = angle
-            
-            # Right arm angles (for push-ups)
-            if len(points) > 16:
-                shoulder = points[12]  # Right shoulder
-                elbow = points[14]  # Right elbow
-                wrist = points[16]  # Right wrist
-                
-                # Calculate elbow angle
-                v1 = shoulder - elbow
-                v2 = wrist - elbow
-                cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                angle = np.degrees(np.arccos(cos_angle))
-                angles['right_elbow_angle'] = angle
-        
-        return angles
-    
-    def _calculate_form_score(self, landmarks: np.ndarray, exercise_type: str, angles: Dict[str, float]) -> float:
-        """Calculate realistic form score based on strict exercise criteria"""
-        points = landmarks.reshape(-1, 3)
-        if len(points) < 33:
+        # Knee (hip-knee-ankle) and elbow (shoulder-elbow-wrist) angles in one compiled pass
+        return _joint_angles(np.asarray(landmarks, dtype=np.float64))
+    
+    def _calculate_form_score(self, landmarks: Union[np.ndarray, LandmarkView], exercise_type: str, angles: np.ndarray,
+                              visibility_score: Optional[float] = None) -> float:
+        """Calculate realistic form score based on strict exercise criteria
+        
+        visibility_score may be passed in when _check_body_visibility already computed it.
+        """
+        # One validated (33, 3) view shared by every check below
+        view = LandmarkView.of(landmarks)
+        if not view.is_full_body:
             return 0.0
         
         # Start with 0 and build up score based on actual form quality
@@ -181,75 +502,60 @@ class PostureAnalyzer:
         max_possible_score = 1.0
         
         # 1. Basic pose visibility (20% of total score)
-        visibility_score = self._calculate_visibility_score(points)
+        if visibility_score is None:
+            visibility_score = self._calculate_visibility_score(view.pts)
         form_score += visibility_score * 0.2
         
         # 2. Exercise-specific form analysis (80% of total score)
-        exercise_score = self._calculate_exercise_specific_score(points, exercise_type, angles)
+        exercise_score = self._calculate_exercise_specific_score(view, exercise_type, angles)
         form_score += exercise_score * 0.8
         
         return min(form_score, 1.0)
     
     def _calculate_visibility_score(self, points: np.ndarray) -> float:
         """Calculate how well key body parts are visible"""
-        key_indices = [11, 12, 23, 24, 25, 26, 27, 28]  # shoulders, hips, knees, ankles
-        visible_points = 0
-        total_points = 0
-        
-        for idx in key_indices:
-            if idx < len(points):
-                total_points += 1
-                # Check if point is within reasonable bounds and has good visibility
-                x, y, z = points[idx]
-                if 0.1 <= x <= 0.9 and 0.1 <= y <= 0.9 and abs(z) < 0.5:
-                    visible_points += 1
+        key_points = points[VISIBILITY_KEY_IDX[VISIBILITY_KEY_IDX < len(points)]]
+        if len(key_points) == 0:
+            return 0.0
         
-        return visible_points / total_points if total_points > 0 else 0.0
+        # Check if each point is within reasonable bounds
+        x, y, z = key_points.T
+        visible = (0.1 <= x) & (x <= 0.9) & (0.1 <= y) & (y <= 0.9) & (np.abs(z) < 0.5)
+        return float(visible.mean())
     
     def _check_body_visibility(self, points: np.ndarray) -> Dict[str, any]:
         """Check if entire body is visible and provide specific feedback"""
         visibility_issues = []
         missing_parts = []
-        visibilities = self._last_landmark_visibilities if self._last_landmark_visibilities else []
-        
-        # Define body parts and their MediaPipe indices
-        body_parts = {
-            'head': [0],  # nose
-            'shoulders': [11, 12],  # left and right shoulders
-            'arms': [13, 14, 15, 16],  # elbows and wrists
-            'hips': [23, 24],  # left and right hips
-            'legs': [25, 26, 27, 28],  # knees and ankles
-            'feet': [29, 30, 31, 32]  # heels and foot index
-        }
         
-        for part_name, indices in body_parts.items():
-            part_visible = 0
-            part_total = 0
-            
-            for idx in indices:
-                if idx < len(points):
-                    part_total += 1
-                    x, y, z = points[idx]
-                    visibility_score = visibilities[idx] if idx < len(visibilities) else 1.0
-                    if 0.0 <= x <= 1.0 and 0.0 <= y <= 1.0 and abs(z) < 1.0 and visibility_score >= 0.3:
-                        part_visible += 1
-            
-            if part_total > 0:
-                visibility_ratio = part_visible / part_total
-                if visibility_ratio < 0.5:  # Less than 50% of part visible
-                    missing_parts.append(part_name)
-                    if part_name == 'head':
-                        visibility_issues.append("Your head is not fully visible. Move back or adjust camera angle.")
-                    elif part_name == 'shoulders':
-                        visibility_issues.append("Your shoulders are cut off. Move back to show your full upper body.")
-                    elif part_name == 'arms':
-                        visibility_issues.append("Your arms are not fully visible. Extend your arms or move back.")
-                    elif part_name == 'hips':
-                        visibility_issues.append("Your hips are not visible. Make sure your torso is in frame.")
-                    elif part_name == 'legs':
-                        visibility_issues.append("Your legs are cut off. Move back to show your full lower body.")
-                    elif part_name == 'feet':
-                        visibility_issues.append("Your feet are not visible. Make sure your entire body is in frame.")
+        # Landmark visibility from the last detection; 1.0 where none was reported
+        n_points = len(points)
+        visibilities = np.ones(n_points)
+        last_visibilities = self._last_landmark_visibilities[:n_points]
+        visibilities[:len(last_visibilities)] = last_visibilities
+        
+        # In-frame check for every landmark at once; the coordinate columns and
+        # |z| are shared with the visibility score computed below
+        x, y, z = points.T
+        abs_z = np.abs(z)
+        visible = (
+            (0.0 <= x) & (x <= 1.0) & (0.0 <= y) & (y <= 1.0) &
+            (abs_z < 1.0) & (visibilities >= 0.3)
+        )
+        
+        # Visible and present landmark counts for every body part in one gather;
+        # indices past the landmarks read a trailing False and count as absent
+        present = BODY_PART_IDX < n_points
+        part_visible = np.append(visible, False)[np.minimum(BODY_PART_IDX, n_points)]
+        present_counts = np.add.reduceat(present, BODY_PART_STARTS)
+        visible_counts = np.add.reduceat(part_visible, BODY_PART_STARTS)
+        
+        # Less than 50% of part visible
+        part_missing = (present_counts > 0) & (visible_counts < 0.5 * present_counts)
+        for (part_name, _, issue), is_missing in zip(BODY_PARTS, part_missing):
+            if is_missing:
+                missing_parts.append(part_name)
+                visibility_issues.append(issue)
         
         # Check overall body positioning
         if len(missing_parts) > 2:
@@ -260,8 +566,8 @@ class PostureAnalyzer:
         # Check if person is too close or too far
         if len(points) >= 33:
             # Check head to feet distance as a proxy for overall size
-            head_y = points[0][1] if len(points) > 0 else 0
-            feet_y = max(points[29][1], points[30][1]) if len(points) > 30 else 0
+            head_y = points[0, 1]
+            feet_y = max(points[29, 1], points[30, 1])
             
             body_height = abs(feet_y - head_y)
             if body_height < 0.3:
@@ -269,84 +575,69 @@ class PostureAnalyzer:
             elif body_height > 0.9:
                 visibility_issues.append("You appear too close to the camera. Move back to show your entire body.")
         
+        # Same bounds as _calculate_visibility_score, on the columns split above
+        key_idx = VISIBILITY_KEY_IDX[VISIBILITY_KEY_IDX < n_points]
+        if len(key_idx) > 0:
+            kx, ky = x[key_idx], y[key_idx]
+            visibility_score = float((
+                (0.1 <= kx) & (kx <= 0.9) & (0.1 <= ky) & (ky <= 0.9) & (abs_z[key_idx] < 0.5)
+            ).mean())
+        else:
+            visibility_score = 0.0
+        
         return {
             'is_fully_visible': len(missing_parts) == 0,
             'missing_parts': missing_parts,
             'visibility_issues': visibility_issues,
-            'visibility_score': self._calculate_visibility_score(points)
+            'visibility_score': visibility_score
         }
     
-    def _calculate_exercise_specific_score(self, points: np.ndarray, exercise_type: str, angles: Dict[str, float]) -> float:
+    def _calculate_exercise_specific_score(self, points: Union[np.ndarray, LandmarkView], exercise_type: str, angles: np.ndarray) -> float:
         """Calculate score based on exercise-specific form criteria"""
-        if exercise_type == 'squat':
-            return self._score_squat_form(points, angles)
-        elif exercise_type == 'pushup':
-            return self._score_pushup_form(points, angles)
-        elif exercise_type == 'plank':
-            return self._score_plank_form(points, angles)
-        elif exercise_type == 'lunge':
-            return self._score_lunge_form(points, angles)
-        elif exercise_type == 'deadlift':
-            return self._score_deadlift_form(points, angles)
-        else:
+        scorer = self._EXERCISE_SCORERS.get(exercise_type)
+        if scorer is None:
             return 0.3  # Default low score for unsupported exercises
+        return scorer(self, points, angles)
     
-    def _score_squat_form(self, points: np.ndarray, angles: Dict[str, float]) -> float:
-        """Score squat form using advanced biomechanical analysis"""
-        # Use advanced biomechanical analyzer
-        biomechanics = self.biomechanical_analyzer.analyze_squat_biomechanics(points, angles)
-        
-        # Add temporal consistency if available
-        consistency = self.temporal_analyzer.calculate_consistency_score()
-        
-        # Combine biomechanical score with consistency
-        base_score = biomechanics['overall_score']
-        final_score = base_score * 0.9 + consistency * 0.1
-        
-        return min(final_score, 1.0)
+    def _score_squat_form(self, points: Union[np.ndarray, LandmarkView], angles: np.ndarray) -> float:
+        """Score squat form from depth, back alignment and knee tracking"""
+        return self._score_biomechanics_form(points, 'squat', angles)
     
-    def _score_pushup_form(self, points: np.ndarray, angles: Dict[str, float]) -> float:
-        """Score push-up form using advanced biomechanical analysis"""
-        # Use advanced biomechanical analyzer
-        biomechanics = self.biomechanical_analyzer.analyze_pushup_biomechanics(points, angles)
-        
-        # Add temporal consistency
-        consistency = self.temporal_analyzer.calculate_consistency_score()
-        
-        # Combine scores
-        base_score = biomechanics['overall_score']
-        final_score = base_score * 0.9 + consistency * 0.1
-        
-        return min(final_score, 1.0)
+    def _score_pushup_form(self, points: Union[np.ndarray, LandmarkView], angles: np.ndarray) -> float:
+        """Score push-up form from body alignment, depth and core engagement"""
+        return self._score_biomechanics_form(points, 'pushup', angles)
     
-    def _score_plank_form(self, points: np.ndarray, angles: Dict[str, float]) -> float:
-        """Score plank form using advanced biomechanical analysis"""
-        # Use advanced biomechanical analyzer
-        biomechanics = self.biomechanical_analyzer.analyze_plank_biomechanics(points, angles)
-        
-        # Add temporal consistency
+    def _score_plank_form(self, points: Union[np.ndarray, LandmarkView], angles: np.ndarray) -> float:
+        """Score plank form from body straightness and hip position"""
+        return self._score_biomechanics_form(points, 'plank', angles)
+    
+    def _score_biomechanics_form(self, points: Union[np.ndarray, LandmarkView], exercise_type: str, angles: np.ndarray) -> float:
+        """Score squat, push-up or plank form using advanced biomechanical analysis"""
+        biomechanics = self.biomechanical_analyzer.analyze(exercise_type, LandmarkView.of(points), angles)
+        return self._with_consistency(biomechanics.overall_score)
+    
+    def _with_consistency(self, base_score: float) -> float:
+        """Blend a biomechanical score with temporal consistency"""
+        # Add temporal consistency if available
         consistency = self.temporal_analyzer.calculate_consistency_score()
         
-        # Combine scores
-        base_score = biomechanics['overall_score']
+        # Combine biomechanical score with consistency
         final_score = base_score * 0.9 + consistency * 0.1
         
         return min(final_score, 1.0)
     
-    def _score_lunge_form(self, points: np.ndarray, angles: Dict[str, float]) -> float:
+    def _score_lunge_form(self, points: Union[np.ndarray, LandmarkView], angles: np.ndarray) -> float:
         """Score lunge form based on strict criteria"""
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            return _lunge_score(view.pts)
+        
+        # Partial landmarks: each check falls back to its default score
         score = 0.0
         
         # 1. Front knee angle (40% of exercise score)
         front_knee_angle = self._calculate_front_knee_angle(points)
-        if 85 <= front_knee_angle <= 95:
-            score += 0.4
-        elif 75 <= front_knee_angle <= 105:
-            score += 0.3
-        elif 65 <= front_knee_angle <= 115:
-            score += 0.2
-        elif 55 <= front_knee_angle <= 125:
-            score += 0.1
+        score += _band_score(LUNGE_FRONT_KNEE_EDGES, LUNGE_FRONT_KNEE_SCORES, abs(front_knee_angle - 90.0))
         
         # 2. Back knee position (30% of exercise score)
         back_knee_score = self._check_back_knee_position(points)
@@ -358,8 +649,13 @@ class PostureAnalyzer:
         
         return score
     
-    def _score_deadlift_form(self, points: np.ndarray, angles: Dict[str, float]) -> float:
+    def _score_deadlift_form(self, points: Union[np.ndarray, LandmarkView], angles: np.ndarray) -> float:
         """Score deadlift form based on strict criteria"""
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            return _deadlift_score(view.pts) + self._check_bar_path(view) * 0.2
+        
+        # Partial landmarks: each check falls back to its default score
         score = 0.0
         
         # 1. Back straightness (50% of exercise score)
@@ -377,58 +673,47 @@ class PostureAnalyzer:
         return score
     
     # Helper methods for detailed form analysis using advanced algorithms
-    def _check_back_alignment(self, points: np.ndarray) -> float:
+    def _check_back_alignment(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if back is straight during squat using spine curvature analysis"""
         spine_analysis = self.geometric_analyzer.calculate_spine_curvature(points)
         return 1.0 - spine_analysis['curvature']
     
-    def _check_knee_tracking(self, points: np.ndarray) -> float:
+    def _check_knee_tracking(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if knees track over toes using geometric analysis"""
         tracking = self.geometric_analyzer.calculate_knee_tracking_accuracy(points)
         return tracking['overall']
     
-    def _check_heel_contact(self, points: np.ndarray) -> float:
+    def _check_heel_contact(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if heels stay on ground using landmark positions"""
-        if len(points.reshape(-1, 3)) >= 33:
-            points_3d = points.reshape(-1, 3)
-            # Check if heels are at similar y-level to toes (on ground)
-            left_heel = points_3d[29] if len(points_3d) > 29 else None
-            left_foot = points_3d[31] if len(points_3d) > 31 else None
-            
-            if left_heel and left_foot:
-                # Heel should be at similar or lower y-level than foot
-                heel_contact = 1.0 if left_heel[1] >= left_foot[1] - 0.05 else 0.7
-                return heel_contact
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            points_3d = view.pts
+            # Check if heels are at similar y-level to toes (on ground):
+            # heel should be at similar or lower y-level than foot
+            return 1.0 if points_3d[29, 1] >= points_3d[31, 1] - 0.05 else 0.7
         return 0.9  # Default good score
     
-    def _check_pushup_alignment(self, points: np.ndarray) -> float:
+    def _check_pushup_alignment(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if body is in straight line during push-up using alignment analysis"""
         alignment = self.geometric_analyzer.calculate_body_alignment_score(points)
         return alignment['alignment']
     
-    def _calculate_elbow_angle(self, points: np.ndarray) -> float:
+    def _calculate_elbow_angle(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Calculate elbow angle during push-up using actual landmarks"""
-        if len(points.reshape(-1, 3)) >= 33:
-            points_3d = points.reshape(-1, 3)
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            points_3d = view.pts
             # Use left arm for calculation
-            if len(points_3d) > 15:
-                shoulder = points_3d[11]
-                elbow = points_3d[13]
-                wrist = points_3d[15]
-                
-                v1 = shoulder - elbow
-                v2 = wrist - elbow
-                
-                if np.linalg.norm(v1) > 0 and np.linalg.norm(v2) > 0:
-                    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                    cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                    return np.degrees(np.arccos(cos_angle))
+            angle = _joint_angle(points_3d[11], points_3d[13], points_3d[15])
+            if not math.isnan(angle):
+                return angle
         return 90.0  # Default 90 degrees
     
-    def _check_head_position(self, points: np.ndarray) -> float:
+    def _check_head_position(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if head is in neutral position"""
-        if len(points.reshape(-1, 3)) >= 33:
-            points_3d = points.reshape(-1, 3)
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            points_3d = view.pts
             nose = points_3d[0]
             left_shoulder = points_3d[11]
             right_shoulder = points_3d[12]
@@ -441,20 +726,21 @@ class PostureAnalyzer:
             return 1.0 / (1.0 + head_offset * 10)
         return 0.8  # Default good score
     
-    def _check_core_engagement(self, points: np.ndarray) -> float:
+    def _check_core_engagement(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if core is engaged using body alignment"""
         alignment = self.geometric_analyzer.calculate_body_alignment_score(points)
         return alignment['vertical_alignment']
     
-    def _check_plank_straightness(self, points: np.ndarray) -> float:
+    def _check_plank_straightness(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if body is straight during plank using alignment analysis"""
         alignment = self.geometric_analyzer.calculate_body_alignment_score(points)
         return alignment['vertical_alignment']
     
-    def _check_hip_position(self, points: np.ndarray) -> float:
+    def _check_hip_position(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if hips are in correct position using geometric analysis"""
-        if len(points.reshape(-1, 3)) >= 33:
-            points_3d = points.reshape(-1, 3)
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            points_3d = view.pts
             left_shoulder = points_3d[11]
             left_hip = points_3d[23]
             left_ankle = points_3d[27]
@@ -468,89 +754,95 @@ class PostureAnalyzer:
             return hip_position_score
         return 0.7  # Default moderate score
     
-    def _check_shoulder_position(self, points: np.ndarray) -> float:
+    def _check_shoulder_position(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if shoulders are in correct position"""
         alignment = self.geometric_analyzer.calculate_body_alignment_score(points)
         return alignment['shoulder_hip_parallel']
     
-    def _calculate_front_knee_angle(self, points: np.ndarray) -> float:
+    def _calculate_front_knee_angle(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Calculate front knee angle during lunge"""
-        if len(points.reshape(-1, 3)) >= 33:
-            points_3d = points.reshape(-1, 3)
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            points_3d = view.pts
             # Use left leg as front leg
-            if len(points_3d) > 27:
-                hip = points_3d[23]
-                knee = points_3d[25]
-                ankle = points_3d[27]
-                
-                v1 = hip - knee
-                v2 = ankle - knee
-                
-                if np.linalg.norm(v1) > 0 and np.linalg.norm(v2) > 0:
-                    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                    cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                    return np.degrees(np.arccos(cos_angle))
+            angle = _joint_angle(points_3d[23], points_3d[25], points_3d[27])
+            if not math.isnan(angle):
+                return angle
         return 90.0  # Default 90 degrees
     
-    def _check_back_knee_position(self, points: np.ndarray) -> float:
+    def _check_back_knee_position(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if back knee is in correct position"""
-        if len(points.reshape(-1, 3)) >= 33:
-            points_3d = points.reshape(-1, 3)
-            # Check right leg as back leg
-            if len(points_3d) > 28:
-                right_hip = points_3d[24]
-                right_knee = points_3d[26]
-                right_ankle = points_3d[28]
-                
-                # Back knee should be bent (not straight)
-                v1 = right_hip - right_knee
-                v2 = right_ankle - right_knee
-                
-                if np.linalg.norm(v1) > 0 and np.linalg.norm(v2) > 0:
-                    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-                    cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                    angle = np.degrees(np.arccos(cos_angle))
-                    
-                    # Good back knee angle is between 80-100 degrees
-                    if 80 <= angle <= 100:
-                        return 1.0
-                    elif 70 <= angle <= 110:
-                        return 0.7
-                    else:
-                        return 0.4
+        view = LandmarkView.of(points)
+        if view.is_full_body:
+            points_3d = view.pts
+            # Check right leg as back leg; back knee should be bent (not straight)
+            angle = _joint_angle(points_3d[24], points_3d[26], points_3d[28])
+            
+            if not math.isnan(angle):
+                # Good back knee angle is between 80-100 degrees
+                return _band_score(LUNGE_BACK_KNEE_EDGES, LUNGE_BACK_KNEE_SCORES, abs(angle - 90.0))
         return 0.7  # Default moderate score
     
-    def _check_torso_alignment(self, points: np.ndarray) -> float:
+    def _check_torso_alignment(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if torso is upright during lunge using spine analysis"""
         spine_analysis = self.geometric_analyzer.calculate_spine_curvature(points)
         return 1.0 - spine_analysis['curvature']
     
-    def _check_deadlift_back(self, points: np.ndarray) -> float:
+    def _check_deadlift_back(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if back is straight during deadlift using spine curvature"""
         spine_analysis = self.geometric_analyzer.calculate_spine_curvature(points)
         return 1.0 - spine_analysis['curvature']
     
-    def _check_hip_hinge(self, points: np.ndarray) -> float:
+    def _check_hip_hinge(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if hip hinge is correct using geometric analysis"""
         hip_angle = self.geometric_analyzer.calculate_hip_hinge_angle(points)
         # Good hip hinge angle is typically between 120-160 degrees
-        if 120 <= hip_angle <= 160:
-            return 1.0
-        elif 100 <= hip_angle <= 180:
-            return 0.7
-        else:
-            return 0.4
+        return _band_score(HIP_HINGE_EDGES, HIP_HINGE_SCORES, abs(hip_angle - 140.0))
     
-    def _check_bar_path(self, points: np.ndarray) -> float:
+    def _check_bar_path(self, points: Union[np.ndarray, LandmarkView]) -> float:
         """Check if bar path is correct (estimated from body movement)"""
         # Without bar detection, estimate from body center movement
         # This is a simplified check - would need bar tracking for accuracy
         return 0.5  # Default lower score (harder to assess without bar)
     
+    def reset(self):
+        """Start a new stream: drop the tracked pose, angle smoothing, movement history and duplicate-frame gate
+        
+        Without it the first frames of a stream are tracked, smoothed and
+        scored against the end of the previous one.
+        """
+        if self.streaming:
+            # Static-image graphs keep no state between frames (and are shared)
+            self.pose.reset()
+        self.temporal_analyzer = TemporalAnalyzer(window_size=10)
+        self.angle_smoother = AngleSmoother()
+        self._last_frame_hash = None
+        self._last_exercise_type = None
+        self._last_result = None
+    
     def analyze_exercise_form(self, image: np.ndarray, exercise_type: str) -> PostureAnalysis:
-        """Analyze exercise form and provide feedback"""
-        landmarks = self.extract_pose_landmarks(image)
+        """Analyze exercise form and provide feedback
+        
+        Streaming analyzers return the previous analysis unchanged when the
+        frame is a near-duplicate of the last one (see DUPLICATE_FRAME_MAX_BITS);
+        call reset() before the first frame of each new stream.
+        """
+        if not self.streaming:
+            return self._analyze_landmarks(self.extract_pose_landmarks(image), exercise_type)
         
+        frame_hash = _dhash(image)
+        if (self._last_result is not None and exercise_type == self._last_exercise_type
+                and bin(frame_hash ^ self._last_frame_hash).count('1') <= DUPLICATE_FRAME_MAX_BITS):
+            return self._last_result
+        
+        result = self._analyze_landmarks(self.extract_pose_landmarks(image), exercise_type)
+        self._last_frame_hash = frame_hash
+        self._last_exercise_type = exercise_type
+        self._last_result = result
+        return result
+    
+    def _analyze_landmarks(self, landmarks: Optional[np.ndarray], exercise_type: str) -> PostureAnalysis:
+        """Score one frame's detected landmarks (None if no pose was found)"""
         if landmarks is None:
             # Provide helpful feedback when no pose is detected
             return PostureAnalysis(
@@ -567,8 +859,7 @@ class PostureAnalyzer:
             )
         
         # Check body visibility first
-        points = landmarks.reshape(-1, 3)
-        visibility_info = self._check_body_visibility(points)
+        visibility_info = self._check_body_visibility(landmarks)
         
         # If body is not fully visible, prioritize visibility feedback
         if not visibility_info['is_fully_visible']:
@@ -591,14 +882,17 @@ class PostureAnalyzer:
         angles = self.calculate_angles(landmarks)
         
         # Smooth angles using Kalman filter for more stable measurements
-        angles = self.angle_smoother.smooth_angles(angles)
+        angles = self.angle_smoother.smooth_vector(angles)
         
-        # Add to temporal analyzer for movement tracking
-        import time
-        self.temporal_analyzer.add_frame(landmarks, angles, time.time())
+        # Add to temporal analyzer for movement tracking; only time spans are
+        # used, so a monotonic clock is enough (and immune to clock changes)
+        self.temporal_analyzer.add_frame(landmarks, angles, perf_counter())
         
-        # Generate form score based on pose detection and advanced analysis
-        form_score = self._calculate_form_score(landmarks, exercise_type, angles)
+        # Generate form score based on pose detection and advanced analysis; the
+        # view wraps landmarks once for every exercise check underneath
+        form_score = self._calculate_form_score(
+            LandmarkView.of(landmarks), exercise_type, angles, visibility_info['visibility_score']
+        )
         
         # Generate corrections based on form criteria
         corrections = self._generate_corrections(exercise_type, angles, form_score)
@@ -622,99 +916,124 @@ class PostureAnalyzer:
             is_correct_form=is_correct_form
         )
     
-    def _generate_corrections(self, exercise_type: str, angles: Dict[str, float], form_score: float) -> List[str]:
+    def analyze_batch(self, images: List[np.ndarray], exercise_type: str) -> List[PostureAnalysis]:
+        """Analyze a batch of frames, returning one PostureAnalysis per frame in order
+        
+        Pose detection runs concurrently on a thread pool, one static-image
+        Pose graph per thread; scoring then runs in frame order so the
+        temporal and smoothing state sees frames in sequence. Streaming
+        analyzers detect sequentially to keep tracking across frames.
+        """
+        if self.streaming or len(images) < 2:
+            return [self.analyze_exercise_form(image, exercise_type) for image in images]
+        
+        analyses = []
+        for landmarks, visibilities in self._detect_frames(images):
+            self._last_landmark_visibilities = visibilities
+            analyses.append(self._analyze_landmarks(landmarks, exercise_type))
+        return analyses
+    
+    def _detect_frames(self, images: List[np.ndarray]):
+        """(landmarks, visibilities) per frame in order; static analyzers detect on the thread pool"""
+        if self.streaming:
+            for image in images:
+                landmarks = self.extract_pose_landmarks(image)
+                yield landmarks, self._last_landmark_visibilities
+            return
+        
+        if self._batch_pool is None:
+            self._batch_pool = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1, thread_name_prefix='pose-batch'
+            )
+        yield from self._batch_pool.map(_detect_pose, images)
+    
+    def precompute_landmarks(self, images: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Run pose detection once over a sequence of frames
+        
+        Returns (T, 33, 3) landmarks and (T, 33) visibilities, NaN for frames
+        where no pose was found. Store them (e.g. with np.savez) and pass them
+        to analyze_landmarks to score the frames again, for any exercise,
+        without re-running MediaPipe.
+        """
+        landmarks = np.full((len(images), 33, 3), np.nan)
+        visibilities = np.full((len(images), 33), np.nan)
+        for t, (frame_landmarks, frame_visibilities) in enumerate(self._detect_frames(images)):
+            if frame_landmarks is not None:
+                landmarks[t] = frame_landmarks
+                visibilities[t, :len(frame_visibilities)] = frame_visibilities
+        return landmarks, visibilities
+    
+    def analyze_landmarks(self, landmarks: np.ndarray, visibilities: np.ndarray,
+                          exercise_type: str) -> List[PostureAnalysis]:
+        """Score precomputed landmarks (see precompute_landmarks), one PostureAnalysis per frame in order"""
+        analyses = []
+        for frame_landmarks, frame_visibilities in zip(landmarks, visibilities):
+            if np.isnan(frame_landmarks).all():
+                self._last_landmark_visibilities = _NO_VISIBILITIES
+                analyses.append(self._analyze_landmarks(None, exercise_type))
+            else:
+                self._last_landmark_visibilities = frame_visibilities
+                analyses.append(self._analyze_landmarks(frame_landmarks, exercise_type))
+        return analyses
+    
+    def _generate_corrections(self, exercise_type: str, angles: np.ndarray, form_score: float) -> List[str]:
         """Generate form corrections based on exercise type and angles"""
         corrections = []
-        criteria = self.form_criteria.get(exercise_type, {})
         
         if exercise_type == 'squat':
-            knee_angle = angles.get('left_knee_angle', 0)
+            knee_angle = angles[LEFT_KNEE_ANGLE]
             if knee_angle < 80:
                 corrections.append("Go deeper - aim for 90-degree knee angle")
             elif knee_angle > 120:
                 corrections.append("Don't go too deep - maintain control")
-            
-            if form_score < 0.7:
-                corrections.append("Keep your back straight and chest up")
-                corrections.append("Ensure knees track over toes")
-        
-        elif exercise_type == 'pushup':
-            if form_score < 0.7:
-                corrections.append("Keep your body in a straight line")
-                corrections.append("Lower chest closer to the ground")
-                corrections.append("Push through your palms, not fingertips")
-        
-        elif exercise_type == 'plank':
-            if form_score < 0.7:
-                corrections.append("Keep your body straight from head to heels")
-                corrections.append("Engage your core muscles")
-                corrections.append("Don't let hips sag or pike up")
-        
-        elif exercise_type == 'lunge':
-            if form_score < 0.7:
-                corrections.append("Keep front knee over ankle")
-                corrections.append("Lower back knee toward ground")
-                corrections.append("Maintain upright torso")
-        
-        elif exercise_type == 'deadlift':
-            if form_score < 0.7:
-                corrections.append("Keep your back straight throughout the movement")
-                corrections.append("Hinge at hips, not waist")
-                corrections.append("Keep the bar close to your body")
+        
+        if form_score < 0.7:
+            corrections.extend(FORM_CORRECTIONS.get(exercise_type, ()))
         
         return corrections
     
-    def _extract_key_points(self, landmarks: np.ndarray) -> Dict[str, Tuple[float, float]]:
-        """Extract key body points for visualization"""
-        points = landmarks.reshape(-1, 3)
-        key_points = {}
-        
-        # Map MediaPipe landmarks to key points
-        landmark_names = [
-            'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer',
-            'right_eye_inner', 'right_eye', 'right_eye_outer',
-            'left_ear', 'right_ear', 'mouth_left', 'mouth_right',
-            'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
-            'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
-            'left_index', 'right_index', 'left_thumb', 'right_thumb',
-            'left_hip', 'right_hip', 'left_knee', 'right_knee',
-            'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
-            'left_foot_index', 'right_foot_index'
-        ]
-        
-        for i, name in enumerate(landmark_names):
-            if i < len(points):
-                key_points[name] = (points[i][0], points[i][1])
-        
-        return key_points
+    def _extract_key_points(self, points: np.ndarray) -> Dict[str, Tuple[float, float]]:
+        """Extract key body points for visualization from (33, 3) landmarks"""
+        # zip stops at the shorter of the two, so partial landmark sets map cleanly
+        return dict(zip(LANDMARK_NAMES, map(tuple, points[:, :2].tolist())))
     
-    def draw_pose_landmarks(self, image: np.ndarray, landmarks: np.ndarray) -> np.ndarray:
-        """Draw pose landmarks on image"""
+    def draw_pose_landmarks(self, image: np.ndarray, landmarks: np.ndarray, in_place: bool = False) -> np.ndarray:
+        """Draw (33, 3) pose landmarks on image
+        
+        Draws on a copy unless in_place is set, for callers that no longer
+        need the original frame; that skips one full-frame copy.
+        """
         if landmarks is None:
             return image
         
-        points = landmarks.reshape(-1, 3)
-        normalized_landmarks = []
-        
-        for point in points:
-            normalized_landmarks.append(
-                landmark_pb2.NormalizedLandmark(
-                    x=float(point[0]),
-                    y=float(point[1]),
-                    z=float(point[2]),
-                    visibility=1.0
-                )
-            )
+        annotated_image = image if in_place else image.copy()
+        height, width = annotated_image.shape[:2]
         
-        landmark_list = landmark_pb2.NormalizedLandmarkList(landmark=normalized_landmarks)
+        # Same rules as mp_drawing.draw_landmarks: landmarks outside the frame
+        # are skipped along with their connections; pixels are floored
+        xy = landmarks[:, :2]
+        in_frame = np.all((xy >= 0) & (xy <= 1), axis=1)
+        xy = np.where(in_frame[:, None], xy, 0.0)
+        pixels = np.minimum(np.floor(xy * (width, height)), (width - 1, height - 1)).astype(np.int32)
         
-        annotated_image = image.copy()
-        self.mp_drawing.draw_landmarks(
-            annotated_image,
-            landmark_list,
-            self.mp_pose.POSE_CONNECTIONS,
-            landmark_drawing_spec=self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-            connection_drawing_spec=self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2)
-        )
+        # Every visible connection as a two-point open polyline, drawn in one call
+        segments = pixels[POSE_CONNECTIONS[in_frame[POSE_CONNECTIONS].all(axis=1)]]
+        cv2.polylines(annotated_image, list(segments), False, POSE_DRAWING_COLOR, 2)
+        
+        # Landmark points after the lines: light border, then the fill
+        pixels = pixels.tolist()
+        for idx in np.flatnonzero(in_frame).tolist():
+            center = tuple(pixels[idx])
+            cv2.circle(annotated_image, center, 3, POSE_LANDMARK_BORDER_COLOR, 2)
+            cv2.circle(annotated_image, center, 2, POSE_DRAWING_COLOR, 2)
         
         return annotated_image
+
+# Per-exercise form scorers, called as scorer(analyzer, points, angles)
+PostureAnalyzer._EXERCISE_SCORERS = MappingProxyType({
+    'squat': PostureAnalyzer._score_squat_form,
+    'pushup': PostureAnalyzer._score_pushup_form,
+    'plank': PostureAnalyzer._score_plank_form,
+    'lunge': PostureAnalyzer._score_lunge_form,
+    'deadlift': PostureAnalyzer._score_deadlift_form
+})
@@ -362,6 +362,9 @@ const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
 const FitnessTrainer = () => {
   const webcamRef = useRef(null);
+  // True while a frame is being analyzed; the interval callback closes over
+  // stale state, so in-flight tracking lives in a ref
+  const analysisInFlightRef = useRef(false);
   const [selectedExercise, setSelectedExercise] = useState('squat');
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [analysisResult, setAnalysisResult] = useState(null);
@@ -386,6 +389,11 @@ const FitnessTrainer = () => {
   };
 
   const analyzePosture = async () => {
+    // At most one frame in flight: drop new captures rather than queue them
+    if (analysisInFlightRef.current) {
+      return;
+    }
+    analysisInFlightRef.current = true;
     setIsAnalyzing(true);
     setError(null);
     
@@ -421,17 +429,14 @@ const FitnessTrainer = () => {
     } catch (err) {
       setError(err.response?.data?.detail || err.message || 'An error occurred during analysis');
     } finally {
+      analysisInFlightRef.current = false;
       setIsAnalyzing(false);
     }
   };
 
   const startContinuousAnalysis = () => {
     setIsCapturing(true);
-    const interval = setInterval(() => {
-      if (!isAnalyzing) {
-        analyzePosture();
-      }
-    }, 2000); // Analyze every 2 seconds
+    const interval = setInterval(analyzePosture, 2000); // Analyze every 2 seconds
 
     // Store interval ID for cleanup
     webcamRef.current.intervalId = interval;
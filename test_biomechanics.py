@@ -0,0 +1,37 @@
+import numpy as np
+
+from backend.services.advanced_analysis import (
+    AdvancedGeometricAnalyzer,
+    BiomechanicalAnalyzer,
+    JOINT_ANGLE_NAMES,
+)
+
+def test_biomechanics_parity_over_random_sequences():
+    """Batched, per-frame and geometric-check scores agree on random landmark sequences"""
+    rng = np.random.default_rng(0)
+    landmarks = rng.random((40, 33, 3))
+    landmarks[::7, 12] = landmarks[::7, 11]  # zero-length shoulder line and spine segment
+    angles = rng.uniform(30.0, 180.0, (40, len(JOINT_ANGLE_NAMES)))
+    angles[::5] = np.nan  # unmeasured joints
+    geometric = AdvancedGeometricAnalyzer
+
+    for exercise_type in BiomechanicalAnalyzer.SUPPORTED_EXERCISES:
+        batch = BiomechanicalAnalyzer.analyze_batch(exercise_type, landmarks.reshape(40, 99), angles)
+        for t, (points, frame_angles) in enumerate(zip(landmarks, angles)):
+            scores = BiomechanicalAnalyzer.analyze(exercise_type, points, frame_angles)
+            for field, value in scores._asdict().items():
+                assert np.isclose(batch[field][t], value), (exercise_type, t, field)
+
+            alignment = geometric.calculate_body_alignment_score(points)
+            if exercise_type == 'squat':
+                assert np.isclose(scores.back_straightness, 1.0 - geometric.calculate_spine_curvature(points)['curvature'])
+                assert np.isclose(scores.knee_tracking, geometric.calculate_knee_tracking_accuracy(points)['overall'])
+                expected = scores.depth_score * 0.4 + scores.back_straightness * 0.3 + scores.knee_tracking * 0.3
+            elif exercise_type == 'pushup':
+                assert np.isclose(scores.body_alignment, alignment['alignment'])
+                assert np.isclose(scores.core_engagement, alignment['vertical_alignment'])
+                expected = scores.body_alignment * 0.4 + scores.depth_score * 0.4 + scores.core_engagement * 0.2
+            else:
+                assert np.isclose(scores.body_straightness, alignment['vertical_alignment'])
+                expected = scores.body_straightness * 0.6 + scores.hip_position * 0.4
+            assert np.isclose(scores.overall_score, expected), (exercise_type, t)
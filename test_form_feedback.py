@@ -0,0 +1,23 @@
+from backend.services.llm_advisor import FormFeedbackCache, VirtualCoachAdvisor
+
+class StubAdvisor:
+    """Fallback form feedback, counting the calls that reach the advisor"""
+
+    def __init__(self):
+        self.advisor = VirtualCoachAdvisor()
+        self.calls = 0
+
+    def analyze_form_feedback(self, exercise_type, form_score, corrections):
+        self.calls += 1
+        return self.advisor.analyze_form_feedback(exercise_type, form_score, corrections)
+
+def test_form_feedback_cache_matches_advisor_tiers():
+    """Cached feedback matches the advisor on both sides of its 0.6/0.8 tier edges, one call per tier"""
+    stub = StubAdvisor()
+    feedback = FormFeedbackCache(stub)
+    for score in (0.59, 0.6, 0.61, 0.62, 0.79, 0.8, 0.81, 0.82, 0.83, 0.84, 0.85):
+        expected = stub.advisor.analyze_form_feedback("squat", score, [])
+        assert feedback.get("squat", score, []) == expected, score
+    assert feedback.get("squat", 0.61, []).startswith("Good form")
+    assert feedback.get("squat", 0.81, []).startswith("Excellent")
+    assert stub.calls == 3